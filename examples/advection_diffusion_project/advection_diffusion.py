@@ -4,6 +4,7 @@ from solver.utilities import EnergyBalance, Plotter
 from solver.mesher import linear_convection_mesh
 from matplotlib import pyplot as plt
 import numpy as np
+import scipy
 import logging
 import math
 
@@ -80,8 +81,8 @@ for mesh_size, cells in mesh_size_dict.items():
 fig, ax = plt.subplots(len(mesh_dict), figsize=(10, 12))
 i = 0
 for mesh_size, mesh in mesh_dict.items():
-    x_cords = mesh.grid["x_grid"].cell_cordinates
-    y_cords = mesh.grid["y_grid"].cell_cordinates
+    x_cords = mesh.grid[0].cell_cordinates
+    y_cords = mesh.grid[1].cell_cordinates
     logger.debug(x_cords)
     xv, yv = np.meshgrid(x_cords, y_cords)
     axis = plt.subplot(len(mesh_dict), 1, i + 1)
@@ -121,8 +122,8 @@ for mesh_size, cells in mesh_size_dict.items():
 fig, ax = plt.subplots(len(generation_mesh_dict), figsize=(10, 12))
 i = 0
 for mesh_size, mesh in generation_mesh_dict.items():
-    x_cords = mesh.grid["x_grid"].cell_cordinates
-    y_cords = mesh.grid["y_grid"].cell_cordinates
+    x_cords = mesh.grid[0].cell_cordinates
+    y_cords = mesh.grid[1].cell_cordinates
     logger.debug(x_cords)
     xv, yv = np.meshgrid(x_cords, y_cords)
     axis = plt.subplot(len(generation_mesh_dict), 1, i + 1)
@@ -165,11 +166,11 @@ def create_advection_diffusion_mesh(velocity, x_cells=60, y_cells=20):
 
     convection_mesh.set_dirichlet_boundary("left", phi=50)
 
-    dx = mesh.grid["x_grid"].cell_width
-    Iy = np.identity(y_cells)
+    dx = mesh.grid[0].cell_width
+    Iy = scipy.sparse.identity(y_cells, format="csr")
     # make the 2d laplacian using the kronecker delta and Iy
     # This puts the 1d laplacian into every 1 in an identity of the shape y_cells x y_cells
-    twod_x_lap = (velocity / dx) * np.kron(Iy, convection_mesh.laplacian)
+    twod_x_lap = (velocity / dx) * scipy.sparse.kron(Iy, convection_mesh.laplacian)
     # logger.debug(f"{twod_x_lap}")
     twod_x_bc = (velocity / (dx)) * convection_mesh.boundary_condition_array.reshape(
         1, x_cells
@@ -0,0 +1,40 @@
+"""
+Ahead of time compile the 2d laplacian stencil.
+
+Running ``python -m solver._build_kernels`` writes the ``solver._lap_kernel``
+extension next to this file. When it is importable _kernels uses it for
+float64 meshes, so the stencil needs neither numba nor a jit warmup at
+runtime.
+"""
+
+import os
+
+from numba.pycc import CC
+
+cc = CC("_lap_kernel")
+cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+
+
+@cc.export("lap2d", "void(f8[:, ::1], f8[:, ::1], f8[:, :], f8[:, :], f8, f8)")
+def lap2d(u, out, x_bands, y_bands, x_scale, y_scale):
+    """Apply the 5 point stencil, see _kernels._lap2d for the band layout."""
+    ny, nx = u.shape
+    for j in range(ny):
+        j_lower = max(j - 1, 0)
+        j_upper = min(j + 1, ny - 1)
+        for i in range(nx):
+            i_lower = max(i - 1, 0)
+            i_upper = min(i + 1, nx - 1)
+            out[j, i] = x_scale * (
+                x_bands[0, i] * u[j, i_lower]
+                + x_bands[1, i] * u[j, i]
+                + x_bands[2, i] * u[j, i_upper]
+            ) + y_scale * (
+                y_bands[0, j] * u[j_lower, i]
+                + y_bands[1, j] * u[j, i]
+                + y_bands[2, j] * u[j_upper, i]
+            )
+
+
+if __name__ == "__main__":
+    cc.compile()
@@ -0,0 +1,346 @@
+"""
+Compiled kernels for the solver hot loops.
+
+numba is an optional dependency, when it is not installed the kernels
+fall back to an equivalent numpy implementation. When the ahead of time
+compiled extension is built (python -m solver._build_kernels) it is used
+for float64 arrays and needs no numba at runtime.
+"""
+
+import numpy as np
+
+# tile sizes for the cache blocked stencil, columns are tiled by a few cache
+# lines and rows so three tile rows stay resident in L2
+TILE_COLUMNS = 64
+L2_CACHE_BYTES = 1024 * 1024
+
+# options for every compiled kernel, cache=True writes the compiled kernels
+# to __pycache__ so new processes skip the compile, kernels must stay at
+# module level for the cache to work
+JIT_OPTIONS = dict(parallel=True, fastmath=True, cache=True, boundscheck=False)
+
+try:
+    from numba import literally, njit, prange
+except ImportError:  # pragma: no cover
+    njit = None
+
+try:
+    from solver._lap_kernel import lap2d as _lap2d_aot
+except ImportError:
+    _lap2d_aot = None
+
+# cupy and numba.cuda are only needed for meshes on the cuda device
+try:
+    import cupy
+    from numba import cuda
+except ImportError:
+    cupy = None
+    cuda = None
+
+# threads per block along each axis of the cuda stencil
+CUDA_BLOCK = 16
+
+# at most this many shape specialized kernels are compiled, past it the
+# generic kernel is used
+MAX_SPECIALIZED = 32
+_specialized = {}
+
+
+def _lap2d_numpy(u, out, x_bands, y_bands, x_scale, y_scale, *tiles):
+    """Apply the 5 point stencil with numpy slices (fallback for numba)."""
+    out[:] = (x_scale * x_bands[1] + y_scale * y_bands[1][:, None]) * u
+    out[:, 1:] += x_scale * x_bands[0, 1:] * u[:, :-1]
+    out[:, :-1] += x_scale * x_bands[2, :-1] * u[:, 1:]
+    out[1:, :] += y_scale * y_bands[0, 1:, None] * u[:-1, :]
+    out[:-1, :] += y_scale * y_bands[2, :-1, None] * u[1:, :]
+
+
+if njit is not None:
+
+    @njit(cache=True, fastmath=True, boundscheck=False)
+    def _lap2d_point(u, x_bands, y_bands, x_scale, y_scale, j, i):
+        """Return the banded 5 point stencil at one cell, with clamped neighbours."""
+        ny, nx = u.shape
+        i_lower = max(i - 1, 0)
+        i_upper = min(i + 1, nx - 1)
+        j_lower = max(j - 1, 0)
+        j_upper = min(j + 1, ny - 1)
+        return x_scale * (
+            x_bands[0, i] * u[j, i_lower]
+            + x_bands[1, i] * u[j, i]
+            + x_bands[2, i] * u[j, i_upper]
+        ) + y_scale * (
+            y_bands[0, j] * u[j_lower, i]
+            + y_bands[1, j] * u[j, i]
+            + y_bands[2, j] * u[j_upper, i]
+        )
+
+    @njit(cache=True, fastmath=True, boundscheck=False)
+    def _lap2d_edges(u, out, x_bands, y_bands, x_scale, y_scale):
+        """Apply the banded stencil on the first and last row and column."""
+        ny, nx = u.shape
+        for j in (0, ny - 1):
+            for i in range(nx):
+                out[j, i] = _lap2d_point(u, x_bands, y_bands, x_scale, y_scale, j, i)
+        for j in range(1, ny - 1):
+            for i in (0, nx - 1):
+                out[j, i] = _lap2d_point(u, x_bands, y_bands, x_scale, y_scale, j, i)
+
+    @njit(inline="always", fastmath=True, boundscheck=False)
+    def _lap2d_tiles(
+        u, out, x_bands, y_bands, x_scale, y_scale, ny, nx, tile_rows, tile_columns
+    ):
+        """
+        Apply the 5 point stencil to the interior in cache blocked tiles.
+
+        The loops run over 1..n-2 without clamping the neighbour indices so
+        they vectorize, the edges are left to _lap2d_edges. Inlined into the
+        generic and the shape specialized kernel so both share this body.
+        """
+        for row_tile in prange((ny + tile_rows - 1) // tile_rows):
+            row_start = max(row_tile * tile_rows, 1)
+            row_end = min(row_tile * tile_rows + tile_rows, ny - 1)
+            for column_start in range(1, nx - 1, tile_columns):
+                column_end = min(column_start + tile_columns, nx - 1)
+                for j in range(row_start, row_end):
+                    y_lower = y_scale * y_bands[0, j]
+                    y_middle = y_scale * y_bands[1, j]
+                    y_upper = y_scale * y_bands[2, j]
+                    for i in range(column_start, column_end):
+                        out[j, i] = (
+                            x_scale
+                            * (
+                                x_bands[0, i] * u[j, i - 1]
+                                + x_bands[1, i] * u[j, i]
+                                + x_bands[2, i] * u[j, i + 1]
+                            )
+                            + y_lower * u[j - 1, i]
+                            + y_middle * u[j, i]
+                            + y_upper * u[j + 1, i]
+                        )
+
+    @njit(**JIT_OPTIONS)
+    def _lap2d(u, out, x_bands, y_bands, x_scale, y_scale, tile_rows, tile_columns):
+        """Apply the 5 point stencil in a single fused, cache blocked pass."""
+        ny, nx = u.shape
+        _lap2d_tiles(
+            u, out, x_bands, y_bands, x_scale, y_scale, ny, nx, tile_rows, tile_columns
+        )
+        _lap2d_edges(u, out, x_bands, y_bands, x_scale, y_scale)
+
+    @njit(**JIT_OPTIONS)
+    def _lap2d_specialized(
+        u, out, x_bands, y_bands, x_scale, y_scale, ny, nx, tile_rows, tile_columns
+    ):
+        """
+        _lap2d compiled with the shape and tile sizes as compile time constants.
+
+        literally makes numba compile (and cache on disk) one version per
+        (ny, nx, tile_rows, tile_columns), so the trip counts are constants.
+        """
+        literally(ny)
+        literally(nx)
+        literally(tile_rows)
+        literally(tile_columns)
+        _lap2d_tiles(
+            u, out, x_bands, y_bands, x_scale, y_scale, ny, nx, tile_rows, tile_columns
+        )
+        _lap2d_edges(u, out, x_bands, y_bands, x_scale, y_scale)
+
+else:  # pragma: no cover
+    _lap2d = _lap2d_numpy
+
+
+def lap2d(u, x_bands, y_bands, x_scale, y_scale, kernel=None):
+    """
+    Apply the 2d laplacian to u.
+
+    args:
+    u: 2d array of shape (y_cells, x_cells), float32 arrays stay float32
+    x_bands, y_bands: (3, n) arrays of the lower, middle and upper diagonals
+        of each axis' differentiation matrix
+    x_scale, y_scale: the scaling of each axis (diffusivity / cell_width**2)
+    kernel: a kernel from specialized_lap2d for u's shape and dtype to use
+        instead of the generic one (default None)
+    returns: 2d array of the laplacian of u
+    """
+    # numba compiles a specialization for each dtype, keep float32 as float32
+    dtype = u.dtype if u.dtype in (np.float32, np.float64) else np.float64
+    u = np.ascontiguousarray(u, dtype=dtype)
+    out = np.empty_like(u)
+    x_bands = np.asarray(x_bands, dtype=dtype)
+    y_bands = np.asarray(y_bands, dtype=dtype)
+    if njit is None and _lap2d_aot is not None and dtype == np.float64:
+        _lap2d_aot(u, out, x_bands, y_bands, float(x_scale), float(y_scale))
+        return out
+
+    if kernel is not None:
+        kernel(u, out, x_bands, y_bands, float(x_scale), float(y_scale))
+        return out
+
+    _lap2d(
+        u,
+        out,
+        x_bands,
+        y_bands,
+        float(x_scale),
+        float(y_scale),
+        tile_rows(u.shape[1], u.itemsize),
+        TILE_COLUMNS,
+    )
+    return out
+
+
+def specialized_lap2d(shape, dtype):
+    """
+    Return a stencil kernel compiled for one mesh shape and dtype.
+
+    The kernel runs _lap2d_specialized with the shape and tile sizes as
+    literals, so the loop trip counts are compile time constants. It
+    compiles on its first call and is cached on disk like the other
+    kernels. Kernels are kept by (ny, nx, dtype), returns None when numba
+    is not installed or MAX_SPECIALIZED kernels exist.
+
+    returns: kernel(u, out, x_bands, y_bands, x_scale, y_scale)
+    """
+    ny, nx = shape
+    dtype = np.dtype(dtype)
+    key = (ny, nx, dtype.str)
+    if key in _specialized:
+        return _specialized[key]
+    if njit is None or len(_specialized) >= MAX_SPECIALIZED:
+        return None
+
+    rows = tile_rows(nx, dtype.itemsize)
+
+    def kernel(u, out, x_bands, y_bands, x_scale, y_scale):
+        _lap2d_specialized(
+            u, out, x_bands, y_bands, x_scale, y_scale, ny, nx, rows, TILE_COLUMNS
+        )
+
+    _specialized[key] = kernel
+    return kernel
+
+
+def tile_rows(nx, itemsize):
+    """Return the number of rows per tile so three rows of u fit in L2."""
+    return max(1, L2_CACHE_BYTES // (3 * nx * itemsize))
+
+
+def _tri_matvec_numpy(bands, x, out):
+    """Multiply a tridiagonal matrix by x with numpy slices (fallback for numba)."""
+    out[:] = bands[1] * x
+    out[1:] += bands[0, 1:] * x[:-1]
+    out[:-1] += bands[2, :-1] * x[1:]
+
+
+if njit is not None:
+
+    @njit(**JIT_OPTIONS)
+    def _tri_matvec(bands, x, out):
+        """Multiply a tridiagonal matrix, stored as (3, n) bands, by x."""
+        n = x.shape[0]
+        for i in prange(1, n - 1):
+            out[i] = (
+                bands[0, i] * x[i - 1] + bands[1, i] * x[i] + bands[2, i] * x[i + 1]
+            )
+        out[0] = bands[1, 0] * x[0]
+        if n > 1:
+            out[0] += bands[2, 0] * x[1]
+            out[n - 1] = bands[0, n - 1] * x[n - 2] + bands[1, n - 1] * x[n - 1]
+
+else:  # pragma: no cover
+    _tri_matvec = _tri_matvec_numpy
+
+
+def tri_matvec(bands, x):
+    """
+    Multiply a tridiagonal matrix by a vector.
+
+    args:
+    bands: (3, n) array of the lower, middle and upper diagonals (see
+        differentiation_matrix.get_bands)
+    x: vector of length n
+    returns: the product as a new vector
+    """
+    dtype = x.dtype if x.dtype in (np.float32, np.float64) else np.float64
+    x = np.ascontiguousarray(x, dtype=dtype)
+    out = np.empty_like(x)
+    _tri_matvec(np.asarray(bands, dtype=dtype), x, out)
+    return out
+
+
+def get_array_module(array):
+    """Return cupy for cupy arrays, otherwise numpy."""
+    if cupy is None:
+        return np
+    return cupy.get_array_module(array)
+
+
+def cuda_available():
+    """Return True when cupy is installed and numba can see a cuda device."""
+    return cupy is not None and cuda.is_available()
+
+
+if cuda is not None:  # pragma: no cover
+
+    @cuda.jit
+    def _lap2d_cuda(u, out, x_bands, y_bands, x_scale, y_scale):
+        """
+        Apply the 5 point stencil with each block's tile and halo in shared memory.
+
+        Threads past the edge of u load clamped values so every halo cell
+        is filled, only threads inside u write to out.
+        """
+        tile = cuda.shared.array((CUDA_BLOCK + 2, CUDA_BLOCK + 2), np.float64)
+        ny, nx = u.shape
+        i, j = cuda.grid(2)
+        tx = cuda.threadIdx.x
+        ty = cuda.threadIdx.y
+        ic = min(i, nx - 1)
+        jc = min(j, ny - 1)
+
+        tile[ty + 1, tx + 1] = u[jc, ic]
+        if tx == 0:
+            tile[ty + 1, 0] = u[jc, max(ic - 1, 0)]
+        if tx == CUDA_BLOCK - 1:
+            tile[ty + 1, CUDA_BLOCK + 1] = u[jc, min(ic + 1, nx - 1)]
+        if ty == 0:
+            tile[0, tx + 1] = u[max(jc - 1, 0), ic]
+        if ty == CUDA_BLOCK - 1:
+            tile[CUDA_BLOCK + 1, tx + 1] = u[min(jc + 1, ny - 1), ic]
+        cuda.syncthreads()
+
+        if j < ny and i < nx:
+            out[j, i] = x_scale * (
+                x_bands[0, i] * tile[ty + 1, tx]
+                + x_bands[1, i] * tile[ty + 1, tx + 1]
+                + x_bands[2, i] * tile[ty + 1, tx + 2]
+            ) + y_scale * (
+                y_bands[0, j] * tile[ty, tx + 1]
+                + y_bands[1, j] * tile[ty + 1, tx + 1]
+                + y_bands[2, j] * tile[ty + 2, tx + 1]
+            )
+
+
+def lap2d_cuda(u, x_bands, y_bands, x_scale, y_scale):  # pragma: no cover
+    """
+    Apply the 2d laplacian to a cupy array u on the gpu.
+
+    Takes the same arguments as lap2d and returns a cupy array, float32
+    arrays stay float32 (the shared memory tile is float64).
+    """
+    dtype = u.dtype if u.dtype in (np.float32, np.float64) else np.float64
+    u = cupy.ascontiguousarray(u, dtype=dtype)
+    out = cupy.empty_like(u)
+    ny, nx = u.shape
+    blocks = ((nx + CUDA_BLOCK - 1) // CUDA_BLOCK, (ny + CUDA_BLOCK - 1) // CUDA_BLOCK)
+    _lap2d_cuda[blocks, (CUDA_BLOCK, CUDA_BLOCK)](
+        u,
+        out,
+        cupy.asarray(x_bands, dtype=dtype),
+        cupy.asarray(y_bands, dtype=dtype),
+        float(x_scale),
+        float(y_scale),
+    )
+    return out
@@ -2,13 +2,15 @@ from solver.mesher import (
     grid,
     differentiation_matrix,
     boundary_condition,
-    side_selector,
+    side_axis,
+    side_index,
     cell_phi,
 )
 
-from solver.utilities import Parser
-from typing import Sequence, Tuple, List
+from solver._kernels import lap2d, lap2d_cuda, get_array_module, specialized_lap2d
+from typing import Optional, Sequence, Tuple
 import numpy as np
+import scipy
 import logging
 
 # create logging configuration
@@ -28,8 +30,6 @@ console_handler.setFormatter(formatter)
 # Add the console handler to the logger
 logger.addHandler(console_handler)
 
-# from cartesian_solver import CartesianSolver
-
 
 class CartesianMesh:
     """
@@ -54,22 +54,35 @@ class CartesianMesh:
     def __init__(
         self,
         dimensions: int = 2,
-        n_cells: List[int] = [4, 4],
-        cordinates: Sequence[Tuple[float, float]] = [(0, 1), (0, 1)],
+        n_cells: Optional[Sequence[int]] = None,
+        cordinates: Optional[Sequence[Tuple[float, float]]] = None,
         mesh_type: str = "finite_volume",
         conductivity: float = 1,
         diffusivity: float = 1,
+        dtype=np.float64,
+        specialize_stencil: bool = False,
     ) -> None:
         """
         Init the cartesian mesh object.
 
         Args:
             dimensions:int = Mesh dimensionality (default 2d)
+            n_cells (list of int): cells in each dimension (default (4, 4))
             cordinates (list of tupples):list of each dimensions cordinates
+                (default ((0, 1), (0, 1)))
             mesh_type: str = finite_volume (default) or finite_difference
+            dtype = floating point type of the mesh arrays (default float64)
+            specialize_stencil: bool = compile the 2d stencil for this mesh
+                shape, worth it for many steps on one mesh (default False)
 
         """
+        # stored as tuples so the mesh shape is immutable and hashable
+        n_cells = (4, 4) if n_cells is None else tuple(n_cells)
+        if cordinates is None:
+            cordinates = ((0, 1), (0, 1))
+        cordinates = tuple(tuple(cordinate) for cordinate in cordinates)
         self.validate_inputs(n_cells, cordinates, dimensions, mesh_type)
+        self.dtype = np.dtype(dtype)
         self.n_cells = n_cells
         self.dimensions = dimensions
         self.cordinates = cordinates
@@ -79,14 +92,24 @@ class CartesianMesh:
         self.differentiation_matrix = self.initalize_differentiation_matrix()
         self.initalize_phi()
         self.boundary_condition = self.initalize_boundary_condition()
-        self.set_laplacian()
+        # None falls back to the generic stencil kernel
+        self.stencil_kernel = None
+        if specialize_stencil and dimensions == 2:
+            self.stencil_kernel = specialized_lap2d(n_cells[::-1], self.dtype)
+        # the laplacian is assembled on first access, see the laplacian property
+        self._laplacian_dirty = True
+        self.laplacian_operator = scipy.sparse.linalg.LinearOperator(
+            shape=(np.prod(self.n_cells), np.prod(self.n_cells)),
+            matvec=self.apply_laplacian,
+            dtype=self.dtype,
+        )
         self.boundary_condition_dict: dict[str, str] = {}
         self.conductivity = conductivity
 
     def validate_inputs(
         self,
-        n_cells: List[int] = [4, 4],
-        cordinates: Sequence[Tuple[float, float]] = [(0, 1), (0, 1)],
+        n_cells: Sequence[int] = (4, 4),
+        cordinates: Sequence[Tuple[float, float]] = ((0, 1), (0, 1)),
         dimensions: int = 2,
         mesh_type: str = "finite_volume",
     ) -> None:
@@ -101,7 +124,7 @@ class CartesianMesh:
         """
         # Implemented dimensions and mesh types
         self.implemented_dimensions: Tuple[str, str] = ("x", "y")
-        self.implemented_mesh_types: str = "finite_volume"
+        self.implemented_mesh_types: Tuple[str] = ("finite_volume",)
 
         if dimensions > len(self.implemented_dimensions):
             raise ValueError("mesh dimesnionality not implemented")
@@ -113,57 +136,58 @@ class CartesianMesh:
             raise ValueError("legth of n_cells list needs to match dimension")
 
         if mesh_type not in self.implemented_mesh_types:
-            raise ValueError(f"{mesh_type}: is not an implemented mesh")
+            raise ValueError(
+                f"mesh_type must be one of {self.implemented_mesh_types}, got {mesh_type}"
+            )
 
     def initalize_grid(self):
-        grid_dict = {}
-        for index in range(0, self.dimensions):
-            grid_dict[f"{self.implemented_dimensions[index]}_grid"] = grid(
+        """
+        Create a grid for each dimension.
+
+        returns: a list of grids indexed by axis (0 = x, 1 = y)
+        """
+        grid_list = [
+            grid(
                 n_cells=self.n_cells[index],
                 cordinates=self.cordinates[index],
                 mesh_type=self.mesh_type,
+                dtype=self.dtype,
             )
-            # flip the y cordinates so the origin is in the top left corner
-            if index == 1:
-                grid_dict["y_grid"].cell_cordinates = np.flip(
-                    grid_dict["y_grid"].cell_cordinates
-                )
-        return grid_dict
+            for index in range(0, self.dimensions)
+        ]
+        # flip the y cordinates so the origin is in the top left corner
+        if self.dimensions == 2:
+            grid_list[1].cell_cordinates = np.flip(grid_list[1].cell_cordinates)
+        return grid_list
 
     def initalize_differentiation_matrix(self):
         """
         Create a differentiation matrix for each dimension.
 
-        returns: a dictionary of differentiation matrix
+        returns: a list of differentiation matrices indexed by axis
         """
-        differentiation_matrix_dict = {}
-        for index in range(0, self.dimensions):
-            differentiation_matrix_dict[
-                f"{self.implemented_dimensions[index]}_differentiation_matrix"
-            ] = differentiation_matrix(
-                n_cells=self.n_cells[index],
-            )
-
-        return differentiation_matrix_dict
+        return [
+            differentiation_matrix(n_cells=self.n_cells[index], dtype=self.dtype)
+            for index in range(0, self.dimensions)
+        ]
 
     def initalize_boundary_condition(self):
         """
         Create a boundary condition array for each dimension.
 
-        returns: a dictionary of boundary conditions
+        returns: a list of boundary conditions indexed by axis
         """
-        boundary_condition_dict = {}
-        for index in range(0, self.dimensions):
-            boundary_condition_dict[
-                f"{self.implemented_dimensions[index]}_boundary_condition_array"
-            ] = boundary_condition(
-                n_cells=self.n_cells[index], mesh_type=self.mesh_type
+        return [
+            boundary_condition(
+                n_cells=self.n_cells[index], mesh_type=self.mesh_type, dtype=self.dtype
             )
-
-        return boundary_condition_dict
+            for index in range(0, self.dimensions)
+        ]
 
     def initalize_phi(self):
-        self.phi = cell_phi(self.n_cells, self.dimensions, self.mesh_type)
+        self.phi = cell_phi(
+            self.n_cells, self.dimensions, self.mesh_type, dtype=self.dtype
+        )
 
     def set_dirichlet_boundary(self, side: str, phi: float):
         """
@@ -174,21 +198,24 @@ class CartesianMesh:
         side: the side to set (left, right (1d) top, bottom (2d))
         phi: the value to set the boundary
         """
-        axis = side_selector().axis(side)
-
-        self.differentiation_matrix[
-            f"{axis}_differentiation_matrix"
-        ].set_dirichlet_boundary(side=side, mesh_type=self.mesh_type)
+        axis = side_axis(side)
+        boundary_index, interior_index = side_index(side)
+        # the laplacian only depends on the boundary type, not its value
+        bc_type_changed = self.boundary_condition_dict.get(side) != "dirichlet"
+
+        if bc_type_changed:
+            self.differentiation_matrix[axis].set_dirichlet_boundary_at(
+                boundary_index, interior_index, self.mesh_type
+            )
 
-        self.boundary_condition[
-            f"{axis}_boundary_condition_array"
-        ].set_dirichlet_boundary(side, phi)
+        self.boundary_condition[axis].set_dirichlet_boundary_at(boundary_index, phi)
 
         self.boundary_condition_dict[side] = "dirichlet"
-        self.set_laplacian()
+        if bc_type_changed:
+            self._laplacian_dirty = True
         self.set_boundary_condition_array()
-        self.phi.set_dirichlet_boundary(side, phi)
-        self.generation = np.zeros(self.n_cells).flatten()
+        self.phi.set_dirichlet_boundary_at(boundary_index, axis, phi)
+        self.generation = np.zeros(np.prod(self.n_cells), dtype=self.dtype)
 
     def set_neumann_boundary(self, side: str, flux: float):
         """
@@ -198,75 +225,120 @@ class CartesianMesh:
         side: str = left, right (1d), top, bottom (2d)
         flux: float = flux into the boundary (negative if out)
         """
-        axis = side_selector().axis(side)
+        axis = side_axis(side)
+        boundary_index, interior_index = side_index(side)
+        bc_type_changed = self.boundary_condition_dict.get(side) != "neumann"
 
-        self.differentiation_matrix[
-            f"{axis}_differentiation_matrix"
-        ].set_neumann_boundary(side, self.mesh_type)
+        if bc_type_changed:
+            self.differentiation_matrix[axis].set_neumann_boundary_at(
+                boundary_index, interior_index, self.mesh_type
+            )
 
-        self.boundary_condition[
-            f"{axis}_boundary_condition_array"
-        ].set_neumann_boundary(
-            side=side, flux=flux, cell_width=self.grid[f"{axis}_grid"].cell_width
+        self.boundary_condition[axis].set_neumann_boundary_at(
+            boundary_index, flux, self.grid[axis].cell_width
         )
         self.boundary_condition_dict[side] = "neumann"
 
-        self.set_laplacian()
+        if bc_type_changed:
+            self._laplacian_dirty = True
         self.set_boundary_condition_array()
 
-    def set_laplacian(self):
+    @property
+    def laplacian(self):
+        """The laplacian, rebuilt only when a boundary type changed since the last access."""
+        if self._laplacian_dirty:
+            self._set_laplacian()
+            self._laplacian_dirty = False
+        return self._laplacian
+
+    @laplacian.setter
+    def laplacian(self, laplacian):
+        self._laplacian = laplacian
+        self._laplacian_dirty = False
+
+    @property
+    def d2x_unscaled(self):
+        """The x differentiation matrix before scaling by diffusivity / dx**2."""
+        return self.differentiation_matrix[0].matrix
+
+    @property
+    def d2y_unscaled(self):
+        """The y differentiation matrix before scaling by diffusivity / dy**2."""
+        return self.differentiation_matrix[1].matrix
+
+    def _set_laplacian(self):
         """Combine the differentiation matricies into a single matrix."""
         if self.dimensions == 1:
-            # d2x = self.x_differentiation_matrix.get_matrix()
-            self.laplacian = self.differentiation_matrix[
-                "x_differentiation_matrix"
-            ].get_matrix() * (self.diffusivity / self.grid["x_grid"].cell_width ** 2)
+            self._laplacian = self.d2x_unscaled * (
+                self.diffusivity * self.grid[0].inv_cell_width_sq
+            )
         elif self.dimensions == 2:
-            self.d2x_unscaled = self.differentiation_matrix[
-                "x_differentiation_matrix"
-            ].get_matrix()
-            self.d2y_unscaled = self.differentiation_matrix[
-                "y_differentiation_matrix"
-            ].get_matrix()
             d2x = self.d2x_unscaled * (
-                self.diffusivity / self.grid["x_grid"].cell_width ** 2
+                self.diffusivity * self.grid[0].inv_cell_width_sq
             )
 
             d2y = self.d2y_unscaled * (
-                self.diffusivity / self.grid["y_grid"].cell_width ** 2
+                self.diffusivity * self.grid[1].inv_cell_width_sq
             )
-            Ix = np.identity(self.grid["x_grid"].n_cells)
-            Iy = np.identity(self.grid["y_grid"].n_cells)
-            self.laplacian = np.kron(Iy, d2x) + np.kron(d2y, Ix)
+            # kronsum(d2x, d2y) = kron(Iy, d2x) + kron(d2y, Ix)
+            self._laplacian = scipy.sparse.kronsum(d2x, d2y, format="csr")
+
+    def apply_laplacian(self, phi):
+        """
+        Apply the laplacian to phi using the 5 point stencil (matrix free).
+
+        args:
+        phi: the flattened phi array (x_cells * y_cells), a cupy array of a
+            2d mesh is applied on the gpu and returns a cupy array
+        returns: the flattened laplacian of phi (equal to laplacian @ phi)
+        """
+        xp = get_array_module(phi)
+        phi = xp.ravel(phi)
+        x_scale = self.diffusivity * self.grid[0].inv_cell_width_sq
+        x_matrix = self.differentiation_matrix[0]
+        if self.dimensions == 1:
+            return x_matrix.apply(phi) * x_scale
+
+        y_scale = self.diffusivity * self.grid[1].inv_cell_width_sq
+        y_matrix = self.differentiation_matrix[1]
+        phi_wide = phi.reshape(self.grid[1].n_cells, self.grid[0].n_cells)
+        x_bands, y_bands = x_matrix.get_bands(), y_matrix.get_bands()
+        if xp is np:
+            laplacian = lap2d(
+                phi_wide,
+                x_bands,
+                y_bands,
+                x_scale,
+                y_scale,
+                kernel=self.stencil_kernel if phi.dtype == self.dtype else None,
+            )
+        else:
+            laplacian = lap2d_cuda(phi_wide, x_bands, y_bands, x_scale, y_scale)
+        return laplacian.ravel()
 
     def set_boundary_condition_array(self):
         """Combine boundary conditions into a single array."""
         if not hasattr(self, "generation"):
-            self.generation = np.zeros(self.n_cells).flatten()
+            self.generation = np.zeros(np.prod(self.n_cells), dtype=self.dtype)
         if self.dimensions == 1:
-            self.boundary_condition_array = self.boundary_condition[
-                "x_boundary_condition_array"
-            ].get_array() * (self.diffusivity / self.grid["x_grid"].cell_width ** 2)
+            self.boundary_condition_array = self.boundary_condition[0].get_array() * (
+                self.diffusivity * self.grid[0].inv_cell_width_sq
+            )
 
         elif self.dimensions == 2:
-            x_bc_array = self.boundary_condition[
-                "x_boundary_condition_array"
-            ].get_array()
+            x_bc_array = self.boundary_condition[0].get_array()
+            y_bc_array = self.boundary_condition[1].get_array()
 
-            y_bc_array = self.boundary_condition[
-                "y_boundary_condition_array"
-            ].get_array()
-
-            x_cells = self.grid["x_grid"].n_cells
-            y_cells = self.grid["y_grid"].n_cells
-            dx = self.grid["x_grid"].cell_width
-            dy = self.grid["y_grid"].cell_width
+            x_cells = self.grid[0].n_cells
+            y_cells = self.grid[1].n_cells
+            inv_dx2 = self.grid[0].inv_cell_width_sq
+            inv_dy2 = self.grid[1].inv_cell_width_sq
 
             self.x_bc_reshape = x_bc_array.reshape(1, x_cells).repeat(y_cells, axis=0)
             self.y_bc_reshape = y_bc_array.reshape(y_cells, 1).repeat(x_cells, axis=1)
             logger.debug(f"generation in set bc {self.generation.shape}")
             square_boundary_condition = (
-                (self.x_bc_reshape * (1 / dx**2)) + (self.y_bc_reshape * (1 / dy**2))
+                (self.x_bc_reshape * inv_dx2) + (self.y_bc_reshape * inv_dy2)
             ) * self.diffusivity
             self.boundary_condition_array = square_boundary_condition.reshape(
                 x_cells * y_cells
@@ -291,26 +363,26 @@ class CartesianMesh:
                 return(2*x+3*y +5)
             set_generation(my_function)
         Behavior
-            This function generates a dictionary for each grid axis in grid.items()
+            This function generates a dictionary for each grid axis in grid
             using the slice function to evalueate the function in the grid space required
             (analagous to linspace). The function is then evaluated on the grid and flattened
             The set_boundary_condition_array is then called to ensure it is added to the boundary condition array
         Reference (https://stackoverflow.com/questions/22774726/numpy-evaluate-function-on-a-grid-of-points)
         """
-        grid_dict = {}
         logger.debug(f"grid:{self.grid}")
         # Generate a dictionary for each axis as either a column or a row.
-        # Analagous to meshgrid
-        for i, (names, cordinate_value) in enumerate(self.grid.items()):
-            grid_dict[(Parser().parse(names))] = cordinate_value.cell_cordinates[
-                (None,) * i
-                + (slice(None),)
-                + (None,) * (len(self.grid.items()) - i - 1)
-            ]
+        # Analagous to meshgrid (np.ix_ is the open, broadcastable form)
+        grid_dict = dict(
+            zip(
+                self.implemented_dimensions,
+                np.ix_(*[axis_grid.cell_cordinates for axis_grid in self.grid]),
+            )
+        )
 
         logger.debug(f"grid_dict:{grid_dict}")
-        self.generation = (function(**grid_dict)).flatten(order="F")
-        logger.debug(f"generation:{function(**grid_dict)}")
+        generation = function(**grid_dict)
+        self.generation = generation.flatten(order="F")
+        logger.debug(f"generation:{generation}")
         logger.debug(f"generation reshape:{self.generation}")
         logger.debug(f"boundary_condition_array:{self.boundary_condition_array}")
         self.set_boundary_condition_array()
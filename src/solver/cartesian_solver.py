@@ -1,9 +1,4 @@
-import numpy as np
-
-
-class SteadySolver(object):
-    def solve(self, laplacian, boundary_condition_array):
-        return np.linalg.solve(laplacian, -boundary_condition_array)
+from solver.solver import SteadySolver
 
 
 class CartesianSolver:
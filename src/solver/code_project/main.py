@@ -4,6 +4,7 @@ from solver.utilities import EnergyBalance, Plotter, VelocityRounder
 from solver.mesher import linear_convection_mesh
 from matplotlib import pyplot as plt
 import numpy as np
+import scipy
 import logging
 import math
 
@@ -76,8 +77,8 @@ class Setup:
         fig, ax = plt.subplots(len(mesh_dictionary), figsize=(10, 12))
         i = 0
         for mesh_size, mesh in mesh_dictionary.items():
-            x_cords = mesh.grid["x_grid"].cell_cordinates
-            y_cords = mesh.grid["y_grid"].cell_cordinates
+            x_cords = mesh.grid[0].cell_cordinates
+            y_cords = mesh.grid[1].cell_cordinates
             logger.debug(x_cords)
             xv, yv = np.meshgrid(x_cords, y_cords)
             axis = plt.subplot(len(mesh_dictionary), 1, i + 1)
@@ -115,8 +116,8 @@ class SteadyStateSolver:
         fig, ax = plt.subplots(len(self.mesh_dict), figsize=(10, 12))
         i = 0
         for mesh_size, mesh in self.mesh_dict.items():
-            x_cords = mesh.grid["x_grid"].cell_cordinates
-            y_cords = mesh.grid["y_grid"].cell_cordinates
+            x_cords = mesh.grid[0].cell_cordinates
+            y_cords = mesh.grid[1].cell_cordinates
             logger.debug(x_cords)
             xv, yv = np.meshgrid(x_cords, y_cords)
             axis = plt.subplot(len(self.mesh_dict), 1, i + 1)
@@ -225,11 +226,11 @@ class AdvectionDiffusionMesh:
 
         convection_mesh.set_dirichlet_boundary("left", phi=50)
 
-        dx = mesh.grid["x_grid"].cell_width
-        Iy = np.identity(y_cells)
+        dx = mesh.grid[0].cell_width
+        Iy = scipy.sparse.identity(y_cells, format="csr")
         # make the 2d laplacian using the kronecker delta and Iy
         # This puts the 1d laplacian into every 1 in an identity of the shape y_cells x y_cells
-        twod_x_lap = (velocity / dx) * np.kron(Iy, convection_mesh.laplacian)
+        twod_x_lap = (velocity / dx) * scipy.sparse.kron(Iy, convection_mesh.laplacian)
         # logger.debug(f"{twod_x_lap}")
         twod_x_bc = (
             velocity / (dx)
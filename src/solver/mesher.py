@@ -1,6 +1,8 @@
+import functools
 import numpy as np
 import scipy
 import logging
+from solver._kernels import tri_matvec
 from typing import Sequence, Tuple, List
 
 # create logging configuration
@@ -20,6 +22,116 @@ console_handler.setFormatter(formatter)
 # Add the console handler to the logger
 logger.addHandler(console_handler)
 
+# (boundary index, first interior index) for each side
+_SIDE_INDEX = {"left": (0, 1), "right": (-1, -2), "top": (0, 1), "bottom": (-1, -2)}
+
+# axis (0 = x, 1 = y) for each side
+_SIDE_AXIS = {"left": 0, "right": 0, "top": 1, "bottom": 1}
+
+# the implemented mesh types
+_VALID_MESH_TYPES = frozenset({"finite_volume", "finite_difference"})
+
+# boundary condition array scaling for each mesh type
+_DIRICHLET_SCALE = {"finite_volume": 2, "finite_difference": 0}
+_NEUMANN_SCALE = {"finite_volume": 1, "finite_difference": 2}
+
+
+def _validate_mesh_type(mesh_type: str) -> None:
+    """Raise a ValueError if mesh_type is not an implemented mesh type."""
+    if mesh_type not in _VALID_MESH_TYPES:
+        raise ValueError(
+            f"mesh_type must be finite_volume or finite_difference, got {mesh_type}"
+        )
+
+
+def side_index(side: str) -> Tuple[int, int]:
+    """Return the (boundary index, first interior index) for a side."""
+    try:
+        return _SIDE_INDEX[side]
+    except KeyError:
+        raise ValueError(f"{side} is not left, right, top or bottom") from None
+
+
+def side_axis(side: str) -> int:
+    """Return the axis (0 = x, 1 = y) a side is normal to."""
+    try:
+        return _SIDE_AXIS[side]
+    except KeyError:
+        raise ValueError(f"{side} is not left, right, top or bottom") from None
+
+
+def bandwidth(matrix) -> Tuple[int, int]:
+    """Return the number of (lower, upper) diagonals of a sparse matrix."""
+    matrix = scipy.sparse.coo_matrix(matrix)
+    if not matrix.nnz:
+        return 0, 0
+    offsets = matrix.col - matrix.row
+    return max(-int(offsets.min()), 0), max(int(offsets.max()), 0)
+
+
+def _is_tridiagonal(matrix) -> bool:
+    """Return True when every non zero entry lies on the three main diagonals."""
+    matrix = scipy.sparse.coo_matrix(matrix)
+    offsets = matrix.col - matrix.row
+    return not (np.abs(offsets[matrix.data != 0]) > 1).any()
+
+
+def banded_form(matrix) -> Tuple[Tuple[int, int], np.ndarray]:
+    """
+    Return a matrix in the banded (ab) form used by scipy.linalg.solve_banded.
+
+    returns: ((lower, upper), ab) the number of lower and upper diagonals and
+    the (lower + upper + 1, n) array with ab[upper + i - j, j] = matrix[i, j]
+    """
+    matrix = scipy.sparse.dia_matrix(matrix)
+    offsets = matrix.offsets if matrix.offsets.size else np.zeros(1, dtype=int)
+    lower = max(-offsets.min(), 0)
+    upper = max(offsets.max(), 0)
+
+    # the solve accumulates in float64 even for float32 meshes
+    ab = np.zeros((lower + upper + 1, matrix.shape[1]), dtype=np.float64)
+    for offset in range(-lower, upper + 1):
+        if offset >= 0:
+            ab[upper - offset, offset:] = matrix.diagonal(offset)
+        else:
+            ab[upper - offset, :offset] = matrix.diagonal(offset)
+    return (lower, upper), ab
+
+
+@functools.lru_cache(maxsize=128)
+def _diagonal_template(n_cells, lower, middle, upper, dtype):
+    """
+    Return a shared csr tridiagonal matrix for repeated mesh sizes.
+
+    The template must not be modified, callers take a copy.
+    """
+    return scipy.sparse.diags(
+        [lower, middle, upper],
+        [-1, 0, 1],
+        shape=(n_cells, n_cells),
+        format="csr",
+        dtype=dtype,
+    )
+
+
+def _csr_set(matrix, row, column, value):
+    """
+    Set matrix[row, column] = value, writing into the csr data when stored.
+
+    An entry outside the sparsity pattern is inserted through lil, so the
+    returned matrix is a new one in that case.
+    """
+    n_rows, n_columns = matrix.shape
+    row, column = row % n_rows, column % n_columns
+    start, end = matrix.indptr[row], matrix.indptr[row + 1]
+    position = np.flatnonzero(matrix.indices[start:end] == column)
+    if position.size:
+        matrix.data[start + position[0]] = value
+        return matrix
+    matrix = matrix.tolil()
+    matrix[row, column] = value
+    return matrix.tocsr()
+
 
 class create_1Dmesh:
     """
@@ -32,7 +144,7 @@ class create_1Dmesh:
 
     """
 
-    def __init__(self, x, n_cells, mesh_type="finite_volume"):
+    def __init__(self, x, n_cells, mesh_type="finite_volume", dtype=np.float64):
         """
         Initialize the Mesh object.
 
@@ -40,36 +152,68 @@ class create_1Dmesh:
         x -- the spatial domain of the mesh in the form [x_min, x_max]
         n_cells -- the number of points for discritization.
         use n_cells as the number of points for the finite volume case
+        dtype -- the floating point type of the mesh arrays (default float64)
 
         Example
         mesh = create_1Dmesh(x=[0, 1], n_cells=3)
         mesh.xcell_center = np.array([0.125,0.375, 0.625, 0.875])
         mesh.deltax = 0.25
         """
+        _validate_mesh_type(mesh_type)
         self.n_cells = n_cells
         self.mesh_type = mesh_type
-        x_grid = grid(n_cells, x, mesh_type)
+        self.dtype = np.dtype(dtype)
+        x_grid = grid(n_cells, x, mesh_type, dtype=self.dtype)
 
         self.delta_x = x_grid.cell_width
-        self.xcell_center = x_grid.cell_cordinates
+        self.inv_delta_x_sq = x_grid.inv_cell_width_sq
+
+        # the per cell vectors live in one contiguous (3, n_cells) buffer,
+        # row 0 phi, row 1 the boundary condition array, row 2 the centers
+        self._state = np.zeros((3, self.n_cells), dtype=self.dtype)
+        self._state[2] = x_grid.cell_cordinates
+        self.xcell_center = self._state[2]
 
-        self.x_differentiation_matrix = differentiation_matrix(self.n_cells)
-        self.laplacian = self.x_differentiation_matrix.get_matrix()
+        self.x_differentiation_matrix = differentiation_matrix(
+            self.n_cells, dtype=self.dtype
+        )
+        self.laplacian = self.x_differentiation_matrix.matrix
 
+        # both objects work on rows of the state buffer rather than
+        # allocating arrays of their own
         self.boundary_condition_object = boundary_condition(
-            n_cells=self.n_cells, mesh_type=self.mesh_type
+            n_cells=self.n_cells,
+            mesh_type=self.mesh_type,
+            dtype=self.dtype,
+            array=self._state[1],
         )
-        self.boundary_condition_array = (
-            self.boundary_condition_object.boundary_condition_array
+        self.boundary_condition_array = self._state[1]
+
+        self.cell_phi = cell_phi(
+            n_cells=n_cells,
+            dim=1,
+            mesh_type=mesh_type,
+            dtype=self.dtype,
+            phi=self._state[0],
         )
+        self.boundary_condition_dict: dict[str, str] = {}
 
-        self.cell_phi = cell_phi(n_cells=n_cells, dim=1, mesh_type=mesh_type)
+    @property
+    def banded(self):
+        """The laplacian in the banded (ab) form LAPACK expects."""
+        return banded_form(self.laplacian)[1]
 
 
 class heat_diffusion_mesh(create_1Dmesh):
     """Create a heat diffusion mesh."""
 
-    def __init__(self, x, n_cells: Sequence[int], mesh_type: str = "finite_volume"):
+    def __init__(
+        self,
+        x,
+        n_cells: Sequence[int],
+        mesh_type: str = "finite_volume",
+        dtype=np.float64,
+    ):
         """
         Initialize a heat diffusion mesh object.
 
@@ -77,9 +221,19 @@ class heat_diffusion_mesh(create_1Dmesh):
            x (type) : the spatial discritization of the domain
            n_cells (int): The number of cells to discritize the domain into
            mesh_type (string) : finite_volume (default) or finite_difference
+           dtype : the floating point type of the mesh arrays (default float64)
         """
-        super().__init__(x, n_cells, mesh_type)
-        self.temperature = self.cell_phi.phi
+        super().__init__(x, n_cells, mesh_type, dtype)
+
+    @property
+    def temperature(self):
+        """The cell temperatures, a view of row 0 of the state buffer."""
+        return self._state[0]
+
+    @temperature.setter
+    def temperature(self, temperature):
+        # copy into the state buffer so the view stays valid
+        self._state[0] = temperature
 
     def set_cell_temperature(self, temperature):
         """
@@ -88,26 +242,54 @@ class heat_diffusion_mesh(create_1Dmesh):
         Example:running mesh.set_internal_temperature(20) would result
         in np.array([20, 20, 20, 20]
         """
+        # cell_phi.phi is a view of the state buffer, set_phi writes through
         self.cell_phi.set_phi(phi=temperature)
-        self.temperature = self.cell_phi.get_phi()
 
     def set_thermal_diffusivity(self, thermal_diffusivity):
         """Set a diffusion constant in square meters per second."""
         self.thermal_diffusivity = thermal_diffusivity
 
+    def solve_implicit(self, dt, alpha, rhs):
+        """
+        Solve (I - alpha*dt/delta_x**2 * laplacian) x = rhs in O(n_cells).
+
+        Parameters:
+           dt (float): the time step size
+           alpha (float): the thermal diffusivity
+           rhs (np.array): the right hand side
+        """
+        k = alpha * dt * self.inv_delta_x_sq
+        (lower, upper), ab = banded_form(self.laplacian)
+        ab *= -k
+        ab[upper] += 1
+        return scipy.linalg.solve_banded((lower, upper), ab, rhs)
+
     def set_dirichlet_boundary(self, side, temperature):
         """Update boundary array and D2 for a dirichlet boundary."""
-        self.x_differentiation_matrix.set_dirichlet_boundary(side, self.mesh_type)
-        self.boundary_condition_object.set_dirichlet_boundary(
-            side=side, phi=temperature
+        boundary_index, interior_index = side_index(side)
+        # D2 only changes with the boundary type, not the boundary value
+        if self.boundary_condition_dict.get(side) != "dirichlet":
+            self.x_differentiation_matrix.set_dirichlet_boundary_at(
+                boundary_index, interior_index, self.mesh_type
+            )
+            self.laplacian = self.x_differentiation_matrix.matrix
+            self.boundary_condition_dict[side] = "dirichlet"
+        self.boundary_condition_object.set_dirichlet_boundary_at(
+            boundary_index, temperature
         )
-        self.cell_phi.set_dirichlet_boundary(side, temperature)
+        self.cell_phi.set_dirichlet_boundary_at(boundary_index, 0, temperature)
 
     def set_neumann_boundary(self, side, flux=0):
         """Update boundary array and D2 for a neumann boundary."""
-        self.x_differentiation_matrix.set_neumann_boundary(side, self.mesh_type)
-        self.boundary_condition_object.set_neumann_boundary(
-            side=side, flux=flux, cell_width=self.delta_x
+        boundary_index, interior_index = side_index(side)
+        if self.boundary_condition_dict.get(side) != "neumann":
+            self.x_differentiation_matrix.set_neumann_boundary_at(
+                boundary_index, interior_index, self.mesh_type
+            )
+            self.laplacian = self.x_differentiation_matrix.matrix
+            self.boundary_condition_dict[side] = "neumann"
+        self.boundary_condition_object.set_neumann_boundary_at(
+            boundary_index, flux, self.delta_x
         )
 
 
@@ -127,6 +309,7 @@ class linear_convection_mesh(create_1Dmesh):
         mesh_type: str = "finite_volume",
         convection_coefficient=1,
         discretization_type: str = "upwind",
+        dtype=np.float64,
     ):
         """
         Initialize a lienar convection mesh object.
@@ -135,46 +318,53 @@ class linear_convection_mesh(create_1Dmesh):
            x : the spatial discritization of the domain
            n_cells (int): The number of cells to discritize the domain into
            mesh_type (string) : finite_voluem (default) or finite_difference
+           dtype : the floating point type of the mesh arrays (default float64)
         Attributes:
            phi: the quantity of interest being transported
            convection_coefficent: a constant convection coefficent
         """
-        super().__init__(x, n_cells, mesh_type)
+        # validate before the parent allocates the grid, matrices and arrays
+        if convection_coefficient <= 0:
+            raise ValueError("only positive convection coefficents are supported")
+        if discretization_type not in ("upwind", "central", "maccormack"):
+            raise ValueError("discritization type not supported")
+        super().__init__(x, n_cells, mesh_type, dtype)
 
         self.discretization_type = discretization_type
         if self.discretization_type == "upwind":
-            self.x_differentiation_matrix = upwind_differentiation_matrix(self.n_cells)
+            self.x_differentiation_matrix = upwind_differentiation_matrix(
+                self.n_cells, dtype=self.dtype
+            )
 
         elif self.discretization_type == "central":
-            self.x_differentiation_matrix = central_differentiation_matrix(self.n_cells)
+            self.x_differentiation_matrix = central_differentiation_matrix(
+                self.n_cells, dtype=self.dtype
+            )
 
         elif self.discretization_type == "maccormack":
             # self.create_maccormack_differentiation_matrix(self.xcell_center)
             self.x_differentiation_matrix = maccormack_differentiation_matrix(
-                self.n_cells
+                self.n_cells, dtype=self.dtype
             )
 
             self.predictor_differentiation_matrix = (
                 self.x_differentiation_matrix.predictor_differentiation_matrix
             )
-        else:
-            raise ValueError("discritization type not supported")
-
-        self.laplacian = self.x_differentiation_matrix.get_matrix()
 
-        if convection_coefficient <= 0:
-            raise ValueError("only positive convection coefficents are supported")
+        self.laplacian = self.x_differentiation_matrix.matrix
         self.convection_coefficent = convection_coefficient
 
-        self.phi = cell_phi(n_cells=n_cells, dim=1, mesh_type=mesh_type)
+        # convection meshes name the cell values phi, kept on self._state[0]
+        self.phi = self.cell_phi
 
     def set_dirichlet_boundary(self, side: str, phi: float):
         """Update boundary array and D2 for a dirichlet boundary."""
-        self.x_differentiation_matrix.set_dirichlet_boundary(side, self.mesh_type)
+        array_index, next_index = side_index(side)
+        self.x_differentiation_matrix.set_dirichlet_boundary_at(
+            array_index, next_index, self.mesh_type
+        )
         # self.boundary_condition_object.set_dirichlet_boundary(side=side, phi=phi / 2)
-        self.phi.set_dirichlet_boundary(side, phi)
-        side_selector().side_validate(side)
-        array_index = side_selector().boundary_index(side)
+        self.phi.set_dirichlet_boundary_at(array_index, 0, phi)
 
         if side == "right":
             sign = -1
@@ -182,23 +372,30 @@ class linear_convection_mesh(create_1Dmesh):
             sign = 1
         else:
             raise ValueError("oops, you shouldnt be here")
-        self.boundary_condition_object.set_dirichlet_boundary(
-            side=side, phi=sign * phi / 2
+        self.boundary_condition_object.set_dirichlet_boundary_at(
+            array_index, sign * phi / 2
         )
 
         if self.mesh_type == "finite_volume":
             if self.discretization_type == "central":
-                self.laplacian[array_index, array_index] = (-1 / 2) * sign
+                value = (-1 / 2) * sign
             elif self.discretization_type == "upwind":
-                self.laplacian[array_index, array_index] = -1
+                value = -1
             else:
                 raise ValueError("oops, unsupported mesh type")
+            # written through the differentiation matrix so the laplacian
+            # stays one matrix and keeps the edits of earlier boundary calls
+            self.x_differentiation_matrix._write_diag(0, array_index, value)
 
         elif self.mesh_type == "finite_difference":
             if self.discretization_type == "maccormack":
-                self.predictor_differentiation_matrix[array_index, :] = 0
+                # zero the stored entries of the boundary row in place
+                predictor = self.predictor_differentiation_matrix
+                row = array_index % self.n_cells
+                predictor.data[predictor.indptr[row] : predictor.indptr[row + 1]] = 0
         else:
             raise ValueError("mesh must be finite_volume or finite_difference")
+        self.laplacian = self.x_differentiation_matrix.matrix
 
     def set_right_boundary(self):
         """
@@ -206,59 +403,153 @@ class linear_convection_mesh(create_1Dmesh):
 
         For finite volume only
         """
-        self.laplacian[-1, -3:] = [1.5, -1, 0.5]
+        for column, value in zip((-3, -2, -1), (1.5, -1, 0.5)):
+            self.x_differentiation_matrix._write_entry(-1, column, value)
+        self.laplacian = self.x_differentiation_matrix.matrix
 
 
 class differentiation_matrix:
     """Create a differentiation matrix."""
 
-    def __init__(self, n_cells: int):
+    # (lower, middle, upper) diagonals, subclasses override these rather
+    # than rebuilding the matrix after __init__
+    diagonals = (1, -2, 1)
+
+    def __init__(self, n_cells: int, dtype=np.float64):
         """
         Initialaze a differentiation  matrix.
 
-        Paramaters: n_cells number of cells
+        Paramaters: n_cells number of cells, dtype the matrix floating point type
         Atributes:
         differentiation_matrix: A sparse  matrix n_cells x n_cells with -2 on the diagonal and a 1 on the +1 and -1 diagonal
+        bands: the same diagonals as a contiguous (3, n_cells) array, see get_bands
 
         """
         self.__n_cells = n_cells
-        self.differentiation_matrix = self.set_diagonal()
+        self.__dtype = dtype
+        self.differentiation_matrix = self.set_diagonal(*self.diagonals)
+        self.bands = np.empty((3, n_cells), dtype=dtype)
+        self.bands[:] = np.reshape(self.diagonals, (3, 1))
+        self.bands[0, 0] = self.bands[2, -1] = 0
+        self.tridiagonal = True
 
     def get_matrix(self):
         """Return: differentiation matrix."""
         return self.differentiation_matrix
 
+    @property
+    def matrix(self):
+        """The csr differentiation matrix, the same object get_matrix returns."""
+        return self.differentiation_matrix
+
+    def apply(self, phi):
+        """
+        Apply the matrix to a vector phi.
+
+        Paramaters:
+        phi (np.array): values to differentiate, 2d meshes use lap2d instead
+        """
+        if not self.tridiagonal:
+            return self.differentiation_matrix @ phi
+        return tri_matvec(self.get_bands(), phi)
+
+    def get_bands(self):
+        """
+        Return the diagonals as a (3, n_cells) array.
+
+        Row 0 is the lower diagonal (matrix[i, i-1]), row 1 the main diagonal
+        and row 2 the upper diagonal (matrix[i, i+1]). Entries outside the
+        matrix (bands[0, 0] and bands[2, -1]) are 0. The array is kept in step
+        with the boundary edits and is not a copy, callers must not modify it.
+
+        Raises ValueError once an entry off the three diagonals was set.
+        """
+        if not self.tridiagonal:
+            raise ValueError("the matrix is no longer tridiagonal")
+        return self.bands
+
+    @property
+    def lower(self):
+        """The lower diagonal, lower[i] = matrix[i, i-1] (lower[0] = 0)."""
+        return self.get_bands()[0]
+
+    @property
+    def middle(self):
+        """The main diagonal."""
+        return self.get_bands()[1]
+
+    @property
+    def upper(self):
+        """The upper diagonal, upper[i] = matrix[i, i+1] (upper[-1] = 0)."""
+        return self.get_bands()[2]
+
     def set_diagonal(self, lower=1, middle=-2, upper=1):
-        """Create a sparce diagonal matrix"""
-        self.diagonal = np.ones(self.__n_cells)
-        return scipy.sparse.spdiags(
-            np.array(
-                [lower * self.diagonal, middle * self.diagonal, upper * self.diagonal]
-            ),
-            np.array([-1, 0, 1]),
-        ).toarray()
+        """Create a sparse (csr) tridiagonal matrix, diags broadcasts the scalars."""
+        # the boundary setters write into the matrix, so copy the template
+        return _diagonal_template(
+            self.__n_cells, lower, middle, upper, np.dtype(self.__dtype)
+        ).copy()
+
+    def _write_diag(self, offset, row, value):
+        """
+        Set matrix[row, row + offset] = value in place.
+
+        The boundary rows are stored entries of the tridiagonal matrix, so
+        the write goes straight into the csr data buffer. Only an entry that
+        is not stored (e.g. a zero diagonal of the central scheme) falls back
+        to inserting it through lil.
+        """
+        row = row % self.__n_cells
+        self._write_entry(row, row + offset, value)
+
+    def _write_entry(self, row, column, value):
+        """
+        Set matrix[row, column] = value, keeping the bands in step.
+
+        A non zero entry off the three diagonals (e.g. a 2nd order boundary
+        stencil) marks the matrix as no longer tridiagonal.
+        """
+        row, column = row % self.__n_cells, column % self.__n_cells
+        self.differentiation_matrix = _csr_set(
+            self.differentiation_matrix, row, column, value
+        )
+        offset = column - row
+        if abs(offset) <= 1:
+            # bands[offset + 1, i] holds matrix[i, i + offset]
+            self.bands[offset + 1, row] = value
+        elif value != 0:
+            self.tridiagonal = False
 
     def set_dirichlet_boundary(self, side, mesh_type):
         """Update boundary array and D2 for a dirichlet boundary."""
-        array_index = side_selector().boundary_index(side)
+        self.set_dirichlet_boundary_at(*side_index(side), mesh_type)
 
+    def set_dirichlet_boundary_at(self, array_index, next_index, mesh_type):
+        """Dirichlet boundary at array_index, next_index is its interior neighbour."""
         if mesh_type == "finite_volume":
-            self.differentiation_matrix[array_index, array_index] = -3
+            self._write_diag(0, array_index, -3)
 
         elif mesh_type == "finite_difference":
-            self.differentiation_matrix[array_index, :] = 0
+            # zero every stored entry of the row in place, including an off
+            # band entry from an earlier boundary stencil
+            matrix = self.differentiation_matrix
+            row = array_index % self.__n_cells
+            matrix.data[matrix.indptr[row] : matrix.indptr[row + 1]] = 0
+            self.bands[:, row] = 0
+            self.tridiagonal = _is_tridiagonal(matrix)
         else:
             raise ValueError("mesh must be finite_volume or finite_difference")
 
     def set_neumann_boundary(self, side, mesh_type):
         """Update the differentiation matrix for a neumann boundary."""
-        boundary_index = side_selector().boundary_index(side)
-        first_interior_index = side_selector().first_interior_index(side)
+        self.set_neumann_boundary_at(*side_index(side), mesh_type)
 
+    def set_neumann_boundary_at(self, boundary_index, first_interior_index, mesh_type):
+        """Neumann boundary at boundary_index, see set_dirichlet_boundary_at."""
         if mesh_type == "finite_volume":
-            self.differentiation_matrix[boundary_index, boundary_index] = -1
+            self._write_diag(0, boundary_index, -1)
         elif mesh_type == "finite_difference":
-            self.differentiation_matrix[boundary_index, first_interior_index] = 2
+            self._write_diag(first_interior_index - boundary_index, boundary_index, 2)
         else:
             raise ValueError(
                 "mesh_type unsupported, please input a finite_volume or finite_difference as mesh type"
@@ -266,26 +557,22 @@ class differentiation_matrix:
 
 
 class upwind_differentiation_matrix(differentiation_matrix):
-    def __init__(self, n_cells: int):
-        """Create a differentiation matrix."""
-        super().__init__(n_cells)
-        self.differentiation_matrix = self.set_diagonal(lower=1, middle=-1, upper=0)
+    diagonals = (1, -1, 0)
 
 
 class central_differentiation_matrix(differentiation_matrix):
-    def __init__(self, n_cells: int):
-        """Create a differentiation matrix."""
-        super().__init__(n_cells)
-        self.differentiation_matrix = self.set_diagonal(lower=0.5, middle=0, upper=-0.5)
+    diagonals = (0.5, 0, -0.5)
 
 
 class maccormack_differentiation_matrix(differentiation_matrix):
-    def __init__(self, n_cells: int):
-        super().__init__(n_cells)
-        self.differentiation_matrix = self.set_diagonal(lower=-1, middle=1, upper=0)
-
-        self.predictor_differentiation_matrix = -np.transpose(
-            self.differentiation_matrix
+    diagonals = (-1, 1, 0)
+
+    def __init__(self, n_cells: int, dtype=np.float64):
+        super().__init__(n_cells, dtype)
+        # the predictor is the negated transpose of (-1, 1, 0), i.e. the
+        # lower and upper diagonals swap, built directly without a transpose
+        self.predictor_differentiation_matrix = self.set_diagonal(
+            lower=0, middle=-1, upper=1
         )
 
 
@@ -303,35 +590,44 @@ class grid:
     """
 
     def __init__(
-        self, n_cells: int, cordinates: tuple[float, float], mesh_type: str
+        self,
+        n_cells: int,
+        cordinates: tuple[float, float],
+        mesh_type: str,
+        dtype=np.float64,
     ) -> None:
         """
         Args:
             n_cells: int = number of cells to discritize the grid
             cordinates: tupple(float, float) = min and max of the grid
             mesh_type (string)=  finite_volume or finite_difference
+            dtype = the floating point type of the cell cordinates
         """
         self.n_cells = n_cells
         self.cordinates = cordinates
+        self.__dtype = dtype
         self.__discritize(mesh_type)
 
     def __discritize(self, mesh_type):
         if mesh_type == "finite_volume":
-            self.cell_width = (self.cordinates[1] - self.cordinates[0]) / (self.n_cells)
-            self.cell_cordinates = np.linspace(
-                self.cordinates[0] + (self.cell_width / 2),
-                self.cordinates[1] - self.cell_width / 2,
-                self.n_cells,
-            )
+            length = self.cordinates[1] - self.cordinates[0]
+            self.cell_width = length / self.n_cells
+            # cell centers sit half a width into each cell, scaled by the
+            # length then divided by n_cells so e.g. 5/6 rounds like linspace
+            self.cell_cordinates = (
+                np.arange(self.n_cells, dtype=self.__dtype) + 0.5
+            ) * length / self.n_cells + self.cordinates[0]
         elif mesh_type == "finite_difference":
             self.cell_width = (self.cordinates[1] - self.cordinates[0]) / (
                 self.n_cells - 1
             )
             self.cell_cordinates = np.linspace(
-                self.cordinates[0], self.cordinates[1], self.n_cells
+                self.cordinates[0], self.cordinates[1], self.n_cells, dtype=self.__dtype
             )
         else:
             raise ValueError("Mesh type not supported")
+        # cached for the laplacian scaling (diffusivity / cell_width**2)
+        self.inv_cell_width_sq = 1.0 / self.cell_width**2
 
 
 class boundary_condition:
@@ -342,27 +638,40 @@ class boundary_condition:
         boundary_condition_array: array[float]
     """
 
-    def __init__(self, n_cells: int, mesh_type: str):
-        self.boundary_condition_array = np.zeros(n_cells)
-        mesh_type_validator().validate(mesh_type)
+    def __init__(self, n_cells: int, mesh_type: str, dtype=np.float64, array=None):
+        """
+        args:
+        array: an existing zeroed array of n_cells to use instead of a new one
+        """
+        _validate_mesh_type(mesh_type)
+        if array is None:
+            array = np.zeros(n_cells, dtype=dtype)
+        self.boundary_condition_array = array
         self.__mesh_type = mesh_type
+        self.__dirichlet_scale = _DIRICHLET_SCALE[mesh_type]
+        self.__neumann_scale = _NEUMANN_SCALE[mesh_type]
 
     def set_dirichlet_boundary(self, side: str, phi: float):
         """Update the boundary contition array for a dirichlet boundary."""
-        boundary_index = side_selector().boundary_index(side)
-        if self.__mesh_type == "finite_volume":
-            self.boundary_condition_array[boundary_index] = 2 * phi
-        elif self.__mesh_type == "finite_difference":
-            self.boundary_condition_array[boundary_index] = 0
+        self.set_dirichlet_boundary_at(side_index(side)[0], phi)
+
+    def set_dirichlet_boundary_at(self, boundary_index: int, phi: float):
+        """Dirichlet boundary value at an already resolved array index."""
+        # finite_volume: 2 * phi, finite_difference: 0
+        self.boundary_condition_array[boundary_index] = self.__dirichlet_scale * phi
 
     def set_neumann_boundary(self, side: str, flux: float, cell_width: float):
         """Update the boundary contition array for a neuiman boundary."""
-        boundary_index = side_selector().boundary_index(side)
-        if self.__mesh_type == "finite_volume":
-            # self.boundary_condition_array[boundary_index] = flux / cell_width
-            self.boundary_condition_array[boundary_index] = flux * cell_width
-        elif self.__mesh_type == "finite_difference":
-            self.boundary_condition_array[boundary_index] = 2 * flux * cell_width
+        self.set_neumann_boundary_at(side_index(side)[0], flux, cell_width)
+
+    def set_neumann_boundary_at(
+        self, boundary_index: int, flux: float, cell_width: float
+    ):
+        """Neumann boundary value at an already resolved array index."""
+        # finite_volume: flux * cell_width, finite_difference: 2 * flux * cell_width
+        self.boundary_condition_array[boundary_index] = (
+            self.__neumann_scale * flux * cell_width
+        )
 
     def get_array(self):
         return self.boundary_condition_array
@@ -373,16 +682,27 @@ class cell_phi:
     An object that stores each cells phi value.
     """
 
-    def __init__(self, n_cells: list[int] | int, dim: int, mesh_type: str):
+    def __init__(
+        self,
+        n_cells: list[int] | int,
+        dim: int,
+        mesh_type: str,
+        dtype=np.float64,
+        phi=None,
+    ):
         """
         Create phi object and store n_cells.
 
         args:
         n_cells: List[int] Number of cells, in the order of [n_xcells, n_ycells}
+        dtype: the floating point type of phi (default float64)
+        phi: an existing zeroed array to store phi in instead of a new one
         """
-        self.phi = np.zeros(np.flip(n_cells))
+        _validate_mesh_type(mesh_type)
+        if phi is None:
+            phi = np.zeros(np.flip(n_cells), dtype=dtype)
+        self.phi = phi
         self.__n_cells = n_cells
-        mesh_type_validator().validate(mesh_type=mesh_type)
         self.mesh_type = mesh_type
         self.dim = dim
 
@@ -391,17 +711,21 @@ class cell_phi:
         Set the value of phi for internal nodes.
 
         Parameters:
-        phi (int, float, list):list of phi at every x value
+        phi (int, float, numpy scalar, list, np.ndarray): phi at every x value
         """
-        if isinstance(phi, (float, int)):
+        if isinstance(phi, (float, int, np.number)):
+            # fill the existing buffer in place, no temporary array
             self.phi.fill(phi)
 
-        elif isinstance(phi, (list)):
-            if np.array(phi).shape != self.phi.shape:
+        elif isinstance(phi, (list, np.ndarray)):
+            # convert once (an ndarray of the right dtype is not copied), then
+            # copy into the existing buffer so views of phi stay valid
+            phi_array = np.asarray(phi, dtype=self.phi.dtype)
+            if phi_array.shape != self.phi.shape:
                 raise ValueError(
-                    f"Inputed shape {np.array(phi).shape} does not match phi shape {self.phi.shape} "
+                    f"Inputed shape {phi_array.shape} does not match phi shape {self.phi.shape} "
                 )
-            self.phi = np.array(phi)
+            np.copyto(self.phi, phi_array)
         else:
             raise TypeError(f"The phi type inputed {type(phi)} not supported")
 
@@ -411,16 +735,18 @@ class cell_phi:
 
     def set_dirichlet_boundary(self, side: str, phi: float):
         """Update phi for a dirichlet boundary."""
-        boundary_index = side_selector().boundary_index(side)
+        self.set_dirichlet_boundary_at(side_index(side)[0], side_axis(side), phi)
 
+    def set_dirichlet_boundary_at(self, boundary_index: int, axis: int, phi: float):
+        """Dirichlet boundary at an already resolved index and axis (0 = x)."""
         if self.mesh_type == "finite_volume":
             pass
 
         elif self.mesh_type == "finite_difference":
             if self.dim == 2:
-                if side in ["left", "right"]:
+                if axis == 0:
                     self.phi[:, boundary_index] = phi
-                elif side in ["top", "bottom"]:
+                else:
                     self.phi[boundary_index, :] = phi
             else:
                 self.phi[boundary_index] = phi
@@ -429,36 +755,28 @@ class cell_phi:
 
 
 class side_selector:
-    """Set the array index to modify based on the boundary side."""
+    """
+    Set the array index to modify based on the boundary side.
+
+    A thin wrapper over side_index and side_axis, kept for callers that
+    inject a selector (EnergyBalance).
+    """
 
     def side_validate(self, side: str):
         "Ensure the side is a valid side."
-        if side not in ["left", "right", "top", "bottom"]:
-            raise ValueError(f"{side} is not left, right, top or bottom")
+        side_index(side)
 
     def boundary_index(self, side: str):
         """Return the index for the first or last row (or column) based on the side."""
-        self.side_validate(side)
-        if side == "left" or side == "top":
-            return 0
-        elif side == "right" or side == "bottom":
-            return -1
+        return side_index(side)[0]
 
     def first_interior_index(self, side: str):
         """Return the index for the first interior cell (1, or -2)."""
-        self.side_validate(side)
-        if side == "left" or side == "top":
-            return 1
-        elif side == "right" or side == "bottom":
-            return -2
+        return side_index(side)[1]
 
     def axis(self, side: str):
         """Return the axis."""
-        self.side_validate(side)
-        if side == "left" or side == "right":
-            return "x"
-        elif side == "top" or side == "bottom":
-            return "y"
+        return "xy"[side_axis(side)]
 
 
 class mesh_type_validator:
@@ -466,17 +784,12 @@ class mesh_type_validator:
 
     def validate(self, mesh_type: str):
         """ensures that the mesh type is either a "finite_volume" or "finite_difference"""
-        if mesh_type not in ("finite_volume", "finite_difference"):
-            raise ValueError(f"{mesh_type} is not finite_volume or finite_difference")
+        _validate_mesh_type(mesh_type)
 
 
 def main():
     pass
 
 
-def init():
-    if __name__ == "__main__":
-        main()
-
-
-init()
+if __name__ == "__main__":
+    main()
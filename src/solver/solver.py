@@ -1,7 +1,10 @@
+import functools
 import numpy as np
 import pandas as pd
+import scipy
 from typing import List
 from solver.cartesian_mesh import CartesianMesh
+from solver.mesher import banded_form, bandwidth, differentiation_matrix
 import logging
 
 # create logging configuration
@@ -25,6 +28,10 @@ logger.addHandler(console_handler)
 class ImplicitStep(object):
     """An object to take an implicit step"""
 
+    def __init__(self):
+        # (laplacian, k, laplacian data, solve) of the last sparse system
+        self._factorized = None
+
     def step(self, k, laplacian, boundary_condition_array, phi):
         """Solve the form ay = x + b.
 
@@ -34,12 +41,43 @@ class ImplicitStep(object):
         b = k + boundary_condition_array
         """
         # solve the form ay = x+b where x= current temp, y= new temp
-        identity_matrix = np.identity(laplacian.shape[0])
-        a = -k * laplacian + identity_matrix
         b = k * boundary_condition_array
+        if scipy.sparse.issparse(laplacian):
+            return self.factorize(k, laplacian)(phi + b)
 
+        identity_matrix = np.identity(laplacian.shape[0])
+        a = -k * laplacian + identity_matrix
         return np.linalg.solve(a, (phi + b))
 
+    def factorize(self, k, laplacian):
+        """
+        Return a function solving [-k*laplacian + I]y = x for a sparse laplacian.
+
+        The factorization is reused while the same laplacian (with unchanged
+        values) and k are passed, so a fixed time step factors once.
+        """
+        cached = self._factorized
+        if (
+            cached is not None
+            and cached[0] is laplacian
+            and cached[1] == k
+            and np.array_equal(cached[2], laplacian.data)
+        ):
+            return cached[3]
+
+        identity_matrix = scipy.sparse.identity(laplacian.shape[0], format="csc")
+        a = -k * laplacian + identity_matrix
+        # 1d meshes are tridiagonal, solve them with a banded O(n) solve,
+        # check the bandwidth first so 2d meshes never build the ab array
+        lower, upper = bandwidth(a)
+        if lower <= 1 and upper <= 1:
+            (lower, upper), ab = banded_form(a)
+            solve = functools.partial(scipy.linalg.solve_banded, (lower, upper), ab)
+        else:
+            solve = scipy.sparse.linalg.splu(a.tocsc()).solve
+        self._factorized = (laplacian, k, laplacian.data.copy(), solve)
+        return solve
+
 
 class ExplicitStep(object):
     """An object to take an explicit step."""
@@ -51,15 +89,23 @@ class ExplicitStep(object):
         a = [k*laplacian + I]
         x = phi
         b = k + boundary_condition_array
+
+        ax is expanded to x + k*laplacian@x so the identity is never built,
+        a differentiation_matrix laplacian is applied with its tridiagonal
+        kernel (falling back to csr when it is not tridiagonal)
         """
-        identity_matrix = np.identity(laplacian.shape[0])
-        a = k * laplacian + identity_matrix
         b = k * boundary_condition_array
-        return a @ phi + b
+        if isinstance(laplacian, differentiation_matrix):
+            return phi + k * laplacian.apply(phi) + b
+        return phi + k * (laplacian @ phi) + b
 
 
 class SteadySolver(object):
     def solve(self, laplacian, boundary_condition_array):
+        if scipy.sparse.issparse(laplacian):
+            return scipy.sparse.linalg.spsolve(
+                laplacian.tocsc(), -boundary_condition_array
+            )
         return np.linalg.solve(laplacian, -boundary_condition_array)
 
 
@@ -131,15 +177,29 @@ class Solver(Saver):
         self.current_time = initial_time
         self.mesh = mesh
         self.laplacian = self.mesh.laplacian
+        # a 1d mesh's laplacian is its differentiation matrix, explicit steps
+        # apply that with the tridiagonal kernel instead of the csr product
+        matrix = getattr(self.mesh, "x_differentiation_matrix", None)
+        if (
+            isinstance(matrix, differentiation_matrix)
+            and matrix.matrix is self.laplacian
+        ):
+            self.explicit_laplacian = matrix
+        else:
+            self.explicit_laplacian = self.laplacian
         self.boundary_condition_array = self.mesh.boundary_condition_array
         self.stepper = stepper
         self.steady_solver = steady_solver
 
     def take_step(self, k, atribute):
+        if self.method == "explicit":
+            laplacian = self.explicit_laplacian
+        else:
+            laplacian = self.laplacian
         return self.stepper.take_step(
             method=self.method,
             k=k,
-            laplacian=self.laplacian,
+            laplacian=laplacian,
             boundary_condition_array=self.boundary_condition_array,
             phi=atribute,
         )
@@ -153,7 +213,7 @@ class Solver(Saver):
             boundary_condition_array=self.boundary_condition_array,
         )
         phi_reshape = np.reshape(solved_phi, phi_shape)
-        self.mesh.phi.set_phi(phi_reshape.tolist())
+        self.mesh.phi.set_phi(phi_reshape)
 
     def solve(
         self, t_final, t_initial=0, record_step=1, compute_error_flag=False, tolerance=0
@@ -170,23 +230,25 @@ class Solver(Saver):
         """
         self.compute_error_flag = compute_error_flag
 
-        self.update_save_dictionary(phi=self.mesh.phi.get_phi())
+        # set_phi writes into the mesh's phi array, so each record is a copy
+        self.update_save_dictionary(phi=self.mesh.phi.get_phi().copy())
         super().save_state(record_type="dictionary", **self.save_dictionary)
 
         self.current_time = t_initial
         # self.error = None
         time_save_index = 1
+        # bound once, the loop runs once per time step
+        get_phi, set_phi = self.mesh.phi.get_phi, self.mesh.phi.set_phi
         while self.current_time < t_final:
-            phi = self.mesh.phi.get_phi()
-            phi.shape = phi.shape
+            phi = get_phi()
             solved_phi = self.take_step(k=self.step_size, atribute=phi.flatten())
 
             phi_reshape = np.reshape(solved_phi, phi.shape)
-            self.mesh.phi.set_phi(phi_reshape.tolist())
+            set_phi(phi_reshape)
 
             self.current_time = self.current_time + self.step_size
             if time_save_index == record_step:
-                self.update_save_dictionary(phi=self.mesh.phi.get_phi())
+                self.update_save_dictionary(phi=get_phi().copy())
                 super().save_state(record_type="dictionary", **self.save_dictionary)
 
                 error = self.compute_error(phi=solved_phi)
@@ -294,15 +356,12 @@ class linear_convection_solver(Solver):
 
     def maccormack_take_step(self, k, atribute):
         laplacian = self.mesh.laplacian
-        identity_matrix = np.identity(self.mesh.n_cells)
         predictor_matrix = self.mesh.predictor_differentiation_matrix
         # self.predictor = (identity_matrix - predictor_matrix)@atribute
         if self.method == "explicit":
-            self.predictor = (identity_matrix - k * predictor_matrix) @ atribute
+            self.predictor = atribute - k * (predictor_matrix @ atribute)
 
-            return 0.5 * (
-                atribute + ((identity_matrix - k * laplacian) @ self.predictor)
-            )
+            return 0.5 * (atribute + self.predictor - k * (laplacian @ self.predictor))
 
         elif self.method == "implicit":
             raise Exception("implicit not implemented for maccormack")
@@ -349,9 +408,5 @@ def main():
     pass
 
 
-def init():
-    if __name__ == "__main__":
-        main()
-
-
-# init()
+if __name__ == "__main__":
+    main()
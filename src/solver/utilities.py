@@ -1,4 +1,5 @@
 import numpy as np
+import scipy
 import logging
 from solver.mesher import side_selector
 from matplotlib import pyplot as plt
@@ -46,8 +47,8 @@ class EnergyBalance:
         self.side_selector = side_selector
         self.x_cells = self.mesh.n_cells[0]
         self.y_cells = self.mesh.n_cells[1]
-        self.x_width = self.mesh.grid["x_grid"].cell_width
-        self.y_width = self.mesh.grid["y_grid"].cell_width
+        self.x_width = self.mesh.grid[0].cell_width
+        self.y_width = self.mesh.grid[1].cell_width
         self.phi = self.mesh.phi.get_phi()
         self.generation = self.set_generation()
         self.x_flux = self.set_x_flux()
@@ -61,35 +62,37 @@ class EnergyBalance:
         return generation
 
     def set_x_flux(self):
-        x_flux_diff_matrix = np.zeros((self.x_cells, self.x_cells))
-        y_identity = np.identity(self.y_cells)
+        # the flux matrix is diagonal, only the boundary cells are non zero
+        x_flux_diagonal = np.zeros(self.x_cells)
+        y_identity = scipy.sparse.identity(self.y_cells)
 
         for side in ["left", "right"]:
             boundary_index = self.side_selector.boundary_index(side)
             differentiation_value = self.differntiation_value(side)
-            x_flux_diff_matrix[boundary_index, boundary_index] = differentiation_value
+            x_flux_diagonal[boundary_index] = differentiation_value
 
-        d2_x = np.kron(y_identity, x_flux_diff_matrix)
+        d2_x = scipy.sparse.kron(
+            y_identity, scipy.sparse.diags(x_flux_diagonal), format="csr"
+        )
 
         self.bray_x_flux = (
             ((d2_x @ self.phi.flatten()) + self.mesh.x_bc_reshape.flatten())
             * (self.mesh.conductivity * self.y_width / self.x_width)
         ).reshape(self.phi.shape)
-        return (
-            ((d2_x @ self.phi.flatten()) + self.mesh.x_bc_reshape.flatten())
-            * (self.mesh.conductivity * self.y_width / self.x_width)
-        ).reshape(self.phi.shape)
+        return self.bray_x_flux
 
     def set_y_flux(self):
-        y_flux_diff_matrix = np.zeros((self.y_cells, self.y_cells))
-        x_identity = np.identity(self.x_cells)
+        y_flux_diagonal = np.zeros(self.y_cells)
+        x_identity = scipy.sparse.identity(self.x_cells)
 
         for side in ["top", "bottom"]:
             boundary_index = self.side_selector.boundary_index(side)
             differentiation_value = self.differntiation_value(side)
-            y_flux_diff_matrix[boundary_index, boundary_index] = differentiation_value
+            y_flux_diagonal[boundary_index] = differentiation_value
 
-        d2_y = np.kron(y_flux_diff_matrix, x_identity)
+        d2_y = scipy.sparse.kron(
+            scipy.sparse.diags(y_flux_diagonal), x_identity, format="csr"
+        )
 
         return (
             ((d2_y @ self.phi.flatten()) + self.mesh.y_bc_reshape.flatten())
@@ -98,10 +101,10 @@ class EnergyBalance:
 
     def set_cell_flux(self):
         """Determine the heat flux for each cell."""
-        x_identity = np.identity(self.x_cells)
-        y_identity = np.identity(self.y_cells)
+        x_identity = scipy.sparse.identity(self.x_cells)
+        y_identity = scipy.sparse.identity(self.y_cells)
 
-        d2y = np.kron(self.mesh.d2y_unscaled, x_identity)
+        d2y = scipy.sparse.kron(self.mesh.d2y_unscaled, x_identity)
 
         cell_y_flux = (
             d2y @ self.phi.flatten() + self.mesh.y_bc_reshape.flatten()
@@ -109,7 +112,7 @@ class EnergyBalance:
             self.mesh.conductivity * self.x_width / self.y_width
         )
 
-        d2x = np.kron(y_identity, self.mesh.d2x_unscaled)
+        d2x = scipy.sparse.kron(y_identity, self.mesh.d2x_unscaled)
         cell_x_flux = (
             d2x @ self.phi.flatten() + self.mesh.x_bc_reshape.flatten()
         ).reshape(self.phi.shape) * (
@@ -188,8 +191,8 @@ class Plotter:
             # for time, data in data_list[row].items():
             time = data_list[row]["time"]
             data = data_list[row]["phi"]
-            x_cords = self.mesh.grid["x_grid"].cell_cordinates
-            y_cords = self.mesh.grid["y_grid"].cell_cordinates
+            x_cords = self.mesh.grid[0].cell_cordinates
+            y_cords = self.mesh.grid[1].cell_cordinates
             logger.debug(row)
             xv, yv = np.meshgrid(x_cords, y_cords)
 
@@ -24,27 +24,25 @@ class Test_1d_CartesianMesh:
         return CartesianMesh(dimensions=1, cordinates=[(0, 1)], n_cells=[4])
 
     def test_1d_cell_width(self, one_d_mesh):
-        assert one_d_mesh.grid["x_grid"].cell_width == 0.25
+        assert one_d_mesh.grid[0].cell_width == 0.25
 
     def test_1d_cell_cordinates(self, one_d_mesh):
         np.testing.assert_array_equal(
-            x=one_d_mesh.grid["x_grid"].cell_cordinates,
+            x=one_d_mesh.grid[0].cell_cordinates,
             y=np.array([0.125, 0.375, 0.625, 0.875]),
         )
 
     def test_1d_differentiation_matrix(self, one_d_mesh, differentation_matrix):
         expected = differentation_matrix(4)
         np.testing.assert_array_equal(
-            x=one_d_mesh.differentiation_matrix[
-                "x_differentiation_matrix"
-            ].get_matrix(),
+            x=one_d_mesh.differentiation_matrix[0].get_matrix().toarray(),
             y=expected,
         )
 
     def test_1d_dirichlet_boundary_condition_array(self, one_d_mesh):
         expected = np.array([0, 0, 0, 0])
         np.testing.assert_array_equal(
-            x=one_d_mesh.boundary_condition["x_boundary_condition_array"].get_array(),
+            x=one_d_mesh.boundary_condition[0].get_array(),
             y=expected,
         )
 
@@ -65,9 +63,7 @@ class Test_1d_CartesianMesh:
         self, one_d_mesh, side, expected
     ):
         one_d_mesh.set_dirichlet_boundary(side=side, phi=30)
-        actual = one_d_mesh.differentiation_matrix[
-            "x_differentiation_matrix"
-        ].get_matrix()
+        actual = one_d_mesh.differentiation_matrix[0].get_matrix().toarray()
         np.testing.assert_array_equal(x=actual, y=expected)
 
     @pytest.mark.parametrize(
@@ -85,7 +81,7 @@ class Test_1d_CartesianMesh:
     )
     def test_set_dirichlet_boundary_boundary_array(self, one_d_mesh, side, expected):
         one_d_mesh.set_dirichlet_boundary(side=side, phi=30)
-        actual = one_d_mesh.boundary_condition["x_boundary_condition_array"].get_array()
+        actual = one_d_mesh.boundary_condition[0].get_array()
         np.testing.assert_array_equal(x=actual, y=expected)
 
     @pytest.mark.parametrize(
@@ -103,7 +99,7 @@ class Test_1d_CartesianMesh:
     )
     def test_set_neumann_boundary_boundary_array(self, one_d_mesh, side, expected):
         one_d_mesh.set_neumann_boundary(side=side, flux=30)
-        actual = one_d_mesh.boundary_condition["x_boundary_condition_array"].get_array()
+        actual = one_d_mesh.boundary_condition[0].get_array()
         np.testing.assert_array_equal(x=actual, y=expected)
 
     @pytest.mark.parametrize(
@@ -132,9 +128,7 @@ class Test_1d_CartesianMesh:
         self, one_d_mesh, side, expected
     ):
         one_d_mesh.set_neumann_boundary(side=side, flux=30)
-        actual = one_d_mesh.differentiation_matrix[
-            "x_differentiation_matrix"
-        ].get_matrix()
+        actual = one_d_mesh.differentiation_matrix[0].get_matrix().toarray()
         np.testing.assert_array_equal(x=actual, y=expected)
 
     # Test a right neuiman, left dirichlet
@@ -145,7 +139,7 @@ class Test_1d_CartesianMesh:
         expected = np.array(
             [[-1, 1, 0, 0], [1, -2, 1, 0], [0, 1, -2, 1], [0, 0, 1, -3]]
         ) * (1 / 0.25**2)
-        np.testing.assert_array_equal(x=one_d_mesh.laplacian, y=expected)
+        np.testing.assert_array_equal(x=one_d_mesh.laplacian.toarray(), y=expected)
 
     # Test a right neuiman, left dirichlet
     def test_boundary_condition_array(self, one_d_mesh):
@@ -156,6 +150,14 @@ class Test_1d_CartesianMesh:
 
         np.testing.assert_array_equal(x=one_d_mesh.boundary_condition_array, y=expected)
 
+    def test_apply_laplacian(self, one_d_mesh):
+        one_d_mesh.set_dirichlet_boundary(side="right", phi=30)
+        one_d_mesh.set_neumann_boundary(side="left", flux=-10)
+        phi = np.array([1.0, 4.0, 9.0, 16.0])
+        np.testing.assert_array_almost_equal(
+            x=one_d_mesh.apply_laplacian(phi), y=one_d_mesh.laplacian @ phi
+        )
+
     def test_set_phi(self, one_d_mesh):
         one_d_mesh.phi.set_phi(10)
         expected = np.array([10, 10, 10, 10])
@@ -193,15 +195,15 @@ class Test_2d_CartesianMesh:
     def two_d_mesh(self):
         return CartesianMesh(dimensions=2, cordinates=[(0, 1), (0, 2)], n_cells=[3, 4])
 
-    cell_width_inputs = [("x_grid", 1 / 3), ("y_grid", 0.5)]
+    cell_width_inputs = [(0, 1 / 3), (1, 0.5)]
 
     @pytest.mark.parametrize("dimension,expected", cell_width_inputs)
     def test_2d_cell_width(self, two_d_mesh, dimension, expected):
         assert two_d_mesh.grid[dimension].cell_width == expected
 
     coordinates_inputs = [
-        ("x_grid", np.array([1 / 6, 3 / 6, 5 / 6])),
-        ("y_grid", np.array([1.75, 1.25, 0.75, 0.25])),
+        (0, np.array([1 / 6, 3 / 6, 5 / 6])),
+        (1, np.array([1.75, 1.25, 0.75, 0.25])),
     ]
 
     @pytest.mark.parametrize("dimension,expected", coordinates_inputs)
@@ -211,8 +213,8 @@ class Test_2d_CartesianMesh:
         )
 
     differentiation_matrix_inputs = [
-        ("x_differentiation_matrix", 3),
-        ("y_differentiation_matrix", 4),
+        (0, 3),
+        (1, 4),
     ]
 
     @pytest.mark.parametrize("dimension,n_cells", differentiation_matrix_inputs)
@@ -222,12 +224,13 @@ class Test_2d_CartesianMesh:
         # matrix = getattr(two_d_mesh, dimension)
         expected = differentation_matrix(n_cells)
         np.testing.assert_array_equal(
-            x=two_d_mesh.differentiation_matrix[dimension].get_matrix(), y=expected
+            x=two_d_mesh.differentiation_matrix[dimension].get_matrix().toarray(),
+            y=expected,
         )
 
     boundary_array_inputs = [
-        ("x_boundary_condition_array", np.array([0, 0, 0])),
-        ("y_boundary_condition_array", np.array([0, 0, 0, 0])),
+        (0, np.array([0, 0, 0])),
+        (1, np.array([0, 0, 0, 0])),
     ]
 
     @pytest.mark.parametrize("dimension,expected", boundary_array_inputs)
@@ -250,10 +253,10 @@ class Test_2d_CartesianMesh:
     @pytest.mark.parametrize(
         "name,side,expected",
         [
-            ("x_differentiation_matrix", "left", left_dirichlet_diff_matrix),
-            ("x_differentiation_matrix", "right", right_dirichlet_diff_matrix),
-            ("y_differentiation_matrix", "top", top_dirichlet_diff_matrix),
-            ("y_differentiation_matrix", "bottom", bottom_dirichlet_diff_matrix),
+            (0, "left", left_dirichlet_diff_matrix),
+            (0, "right", right_dirichlet_diff_matrix),
+            (1, "top", top_dirichlet_diff_matrix),
+            (1, "bottom", bottom_dirichlet_diff_matrix),
         ],
     )
     def test_set_dirichlet_boundary_differentiaton_matrix(
@@ -261,7 +264,7 @@ class Test_2d_CartesianMesh:
     ):
         two_d_mesh.set_dirichlet_boundary(side=side, phi=30)
         # matrix = getattr(two_d_mesh, name)
-        actual = two_d_mesh.differentiation_matrix[name].get_matrix()
+        actual = two_d_mesh.differentiation_matrix[name].get_matrix().toarray()
         np.testing.assert_array_equal(x=actual, y=expected)
 
     left_dirichlet_bc_array = np.array([60, 0, 0])
@@ -272,10 +275,10 @@ class Test_2d_CartesianMesh:
     @pytest.mark.parametrize(
         "name,side,expected",
         [
-            ("x_boundary_condition_array", "left", left_dirichlet_bc_array),
-            ("x_boundary_condition_array", "right", right_dirichlet_bc_array),
-            ("y_boundary_condition_array", "top", top_dirichlet_bc_array),
-            ("y_boundary_condition_array", "bottom", bottom_dirichlet_bc_array),
+            (0, "left", left_dirichlet_bc_array),
+            (0, "right", right_dirichlet_bc_array),
+            (1, "top", top_dirichlet_bc_array),
+            (1, "bottom", bottom_dirichlet_bc_array),
         ],
     )
     def test_set_dirichlet_boundary_boundary_array(
@@ -297,10 +300,10 @@ class Test_2d_CartesianMesh:
     @pytest.mark.parametrize(
         "name,side,expected",
         [
-            ("x_differentiation_matrix", "left", left_neumann_diff_matrix),
-            ("x_differentiation_matrix", "right", right_neumann_diff_matrix),
-            # ("y_differentiation_matrix", "top", top_neumann_diff_matrix),
-            # ("y_differentiation_matrix", "bottom", bottom_neumann_diff_matrix),
+            (0, "left", left_neumann_diff_matrix),
+            (0, "right", right_neumann_diff_matrix),
+            # (1, "top", top_neumann_diff_matrix),
+            # (1, "bottom", bottom_neumann_diff_matrix),
         ],
     )
     def test_set_neumann_boundary_differentiaton_matrix(
@@ -308,7 +311,7 @@ class Test_2d_CartesianMesh:
     ):
         two_d_mesh.set_neumann_boundary(side=side, flux=-10)
         # matrix = getattr(two_d_mesh, name)
-        actual = two_d_mesh.differentiation_matrix[name].get_matrix()
+        actual = two_d_mesh.differentiation_matrix[name].get_matrix().toarray()
         print(side)
         np.testing.assert_array_equal(x=actual, y=expected)
 
@@ -320,10 +323,10 @@ class Test_2d_CartesianMesh:
     @pytest.mark.parametrize(
         "name,side,expected",
         [
-            ("x_boundary_condition_array", "left", left_neumann_bc_array),
-            ("x_boundary_condition_array", "right", right_neumann_bc_array),
-            ("y_boundary_condition_array", "top", top_neumann_bc_array),
-            ("y_boundary_condition_array", "bottom", bottom_neumann_bc_array),
+            (0, "left", left_neumann_bc_array),
+            (0, "right", right_neumann_bc_array),
+            (1, "top", top_neumann_bc_array),
+            (1, "bottom", bottom_neumann_bc_array),
         ],
     )
     def test_set_neumann_boundary_boundary_array(
@@ -364,7 +367,89 @@ class Test_2d_CartesianMesh:
             ]
         )
 
-        np.testing.assert_array_equal(x=steady_mesh.laplacian, y=expected)
+        np.testing.assert_array_equal(x=steady_mesh.laplacian.toarray(), y=expected)
+
+    def test_laplacian_rebuilt_on_access(self, mocker):
+        mesh = CartesianMesh(dimensions=2, n_cells=[3, 4], cordinates=[(0, 1), (0, 2)])
+        spy = mocker.spy(mesh, "_set_laplacian")
+        mesh.set_dirichlet_boundary(side="left", phi=40)
+        mesh.set_neumann_boundary(side="top", flux=-20)
+        mesh.set_dirichlet_boundary(side="right", phi=30)
+        assert spy.call_count == 0
+        mesh.laplacian
+        mesh.laplacian
+        assert spy.call_count == 1
+
+    def test_boundary_value_update_keeps_laplacian(self, steady_mesh):
+        laplacian = steady_mesh.laplacian
+        steady_mesh.set_dirichlet_boundary(side="left", phi=40)
+        steady_mesh.set_neumann_boundary(side="top", flux=-20)
+        assert steady_mesh.laplacian is laplacian
+        np.testing.assert_array_equal(
+            x=steady_mesh.boundary_condition[0].get_array(),
+            y=np.array([80, 0, 60]),
+        )
+
+    def test_apply_laplacian(self, steady_mesh):
+        phi = np.arange(12.0)
+        expected = steady_mesh.laplacian @ phi
+        np.testing.assert_array_almost_equal(
+            x=steady_mesh.apply_laplacian(phi), y=expected
+        )
+        np.testing.assert_array_almost_equal(
+            x=steady_mesh.laplacian_operator @ phi, y=expected
+        )
+
+    def test_apply_laplacian_specialized(self):
+        pytest.importorskip("numba")
+        mesh = CartesianMesh(
+            dimensions=2,
+            n_cells=[3, 4],
+            cordinates=[(0, 1), (0, 2)],
+            specialize_stencil=True,
+        )
+        mesh.set_dirichlet_boundary(side="left", phi=40)
+        mesh.set_neumann_boundary(side="top", flux=-20)
+        assert mesh.stencil_kernel is not None
+        phi = np.arange(12.0)
+        np.testing.assert_array_almost_equal(
+            x=mesh.apply_laplacian(phi), y=mesh.laplacian @ phi
+        )
+
+    def test_inputs_stored_as_tuples(self):
+        n_cells = [3, 4]
+        mesh = CartesianMesh(dimensions=2, n_cells=n_cells, cordinates=[(0, 1), (0, 2)])
+        n_cells.append(5)
+        assert mesh.n_cells == (3, 4)
+        assert mesh.cordinates == ((0, 1), (0, 2))
+        assert CartesianMesh().n_cells == (4, 4)
+
+    def test_float32_mesh(self):
+        mesh = CartesianMesh(
+            dimensions=2,
+            n_cells=[3, 4],
+            cordinates=[(0, 1), (0, 2)],
+            dtype=np.float32,
+        )
+        mesh.set_dirichlet_boundary(side="left", phi=40)
+        assert mesh.laplacian.dtype == np.float32
+        assert mesh.boundary_condition_array.dtype == np.float32
+        assert mesh.phi.get_phi().dtype == np.float32
+        assert mesh.apply_laplacian(np.ones(12, dtype=np.float32)).dtype == np.float32
+
+    def test_apply_laplacian_cuda(self, steady_mesh):
+        cupy = pytest.importorskip("cupy")
+        from solver._kernels import cuda_available
+
+        if not cuda_available():
+            pytest.skip("no cuda device")
+        phi = np.arange(12.0)
+        actual = steady_mesh.apply_laplacian(cupy.asarray(phi))
+        np.testing.assert_array_almost_equal(
+            x=cupy.asnumpy(actual), y=steady_mesh.laplacian @ phi
+        )
+        phi_32 = cupy.asarray(phi, dtype=cupy.float32)
+        assert steady_mesh.apply_laplacian(phi_32).dtype == cupy.float32
 
     def test_boundary_condition_array(self, steady_mesh):
         expected = np.array(
@@ -441,6 +526,7 @@ class Test_CartesianMesh_exceptions:
         ({"dimensions": 2, "cordinates": [(0, 1)]}),
         ({"dimensions": 2, "n_cells": [5]}),
         ({"dimensions": 1}),
+        ({"mesh_type": "volume"}),
         # ({"mesh_type": "finite_difference"}),
     ]
 
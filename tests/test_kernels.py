@@ -0,0 +1,152 @@
+import numpy as np
+import pytest
+from solver import _kernels
+from solver.mesher import differentiation_matrix
+
+
+class TestLap2d:
+    @pytest.fixture
+    def bands(self):
+        x_matrix = differentiation_matrix(n_cells=3)
+        y_matrix = differentiation_matrix(n_cells=4)
+        x_matrix.set_dirichlet_boundary("left", "finite_volume")
+        y_matrix.set_neumann_boundary("top", "finite_volume")
+        return x_matrix, y_matrix
+
+    def test_lap2d_matches_kron(self, bands):
+        x_matrix, y_matrix = bands
+        u = np.arange(12.0).reshape(4, 3)
+        laplacian = 9 * np.kron(np.identity(4), x_matrix.get_matrix().toarray()) + (
+            4 * np.kron(y_matrix.get_matrix().toarray(), np.identity(3))
+        )
+        actual = _kernels.lap2d(u, x_matrix.get_bands(), y_matrix.get_bands(), 9, 4)
+        np.testing.assert_array_almost_equal(x=actual.ravel(), y=laplacian @ u.ravel())
+
+    def test_lap2d_numpy_fallback(self, bands):
+        x_matrix, y_matrix = bands
+        u = np.arange(12.0).reshape(4, 3)
+        x_bands, y_bands = x_matrix.get_bands(), y_matrix.get_bands()
+        expected = _kernels.lap2d(u, x_bands, y_bands, 9, 4)
+        actual = np.empty_like(u)
+        _kernels._lap2d_numpy(u, actual, x_bands, y_bands, 9, 4)
+        np.testing.assert_array_almost_equal(x=actual, y=expected)
+
+    def test_lap2d_tiles(self, bands):
+        """Tiles smaller than the mesh must give the same result."""
+        x_matrix, y_matrix = bands
+        u = np.arange(12.0).reshape(4, 3)
+        x_bands, y_bands = x_matrix.get_bands(), y_matrix.get_bands()
+        expected = _kernels.lap2d(u, x_bands, y_bands, 9, 4)
+        actual = np.empty_like(u)
+        _kernels._lap2d(u, actual, x_bands, y_bands, 9.0, 4.0, 3, 2)
+        np.testing.assert_array_almost_equal(x=actual, y=expected)
+
+    def test_lap2d_float32(self, bands):
+        x_matrix, y_matrix = bands
+        u = np.arange(12.0).reshape(4, 3)
+        x_bands, y_bands = x_matrix.get_bands(), y_matrix.get_bands()
+        expected = _kernels.lap2d(u, x_bands, y_bands, 9, 4)
+        actual = _kernels.lap2d(u.astype(np.float32), x_bands, y_bands, 9, 4)
+        assert actual.dtype == np.float32
+        np.testing.assert_allclose(actual=actual, desired=expected, rtol=1e-6)
+
+    def test_lap2d_aot(self, bands):
+        lap_kernel = pytest.importorskip("solver._lap_kernel")
+        x_matrix, y_matrix = bands
+        u = np.arange(12.0).reshape(4, 3)
+        x_bands, y_bands = x_matrix.get_bands(), y_matrix.get_bands()
+        expected = np.empty_like(u)
+        _kernels._lap2d_numpy(u, expected, x_bands, y_bands, 9, 4)
+        actual = np.empty_like(u)
+        lap_kernel.lap2d(u, actual, x_bands, y_bands, 9.0, 4.0)
+        np.testing.assert_array_almost_equal(x=actual, y=expected)
+
+    def test_specialized_lap2d(self):
+        pytest.importorskip("numba")
+        x_matrix = differentiation_matrix(n_cells=9)
+        y_matrix = differentiation_matrix(n_cells=7)
+        x_matrix.set_dirichlet_boundary("right", "finite_volume")
+        y_matrix.set_neumann_boundary("bottom", "finite_difference")
+        x_bands, y_bands = x_matrix.get_bands(), y_matrix.get_bands()
+        u = np.arange(63.0).reshape(7, 9) ** 2
+        expected = np.empty_like(u)
+        _kernels._lap2d_numpy(u, expected, x_bands, y_bands, 9, 4)
+        kernel = _kernels.specialized_lap2d(u.shape, np.float64)
+        actual = np.empty_like(u)
+        kernel(u, actual, x_bands, y_bands, 9.0, 4.0)
+        np.testing.assert_array_almost_equal(x=actual, y=expected)
+        assert _kernels.specialized_lap2d(u.shape, np.float64) is kernel
+
+    def test_specialized_lap2d_random_bands(self):
+        pytest.importorskip("numba")
+        rng = np.random.default_rng(1)
+        u = rng.random((6, 7))
+        x_bands, y_bands = rng.random((3, 7)), rng.random((3, 6))
+        x_bands[0, 0] = x_bands[2, -1] = y_bands[0, 0] = y_bands[2, -1] = 0
+        expected = np.empty_like(u)
+        _kernels._lap2d_numpy(u, expected, x_bands, y_bands, 9, 4)
+        kernel = _kernels.specialized_lap2d(u.shape, np.float64)
+        actual = _kernels.lap2d(u, x_bands, y_bands, 9, 4, kernel=kernel)
+        np.testing.assert_array_almost_equal(x=actual, y=expected)
+
+    def test_specialized_lap2d_cache_full(self, mocker):
+        mocker.patch.object(_kernels, "MAX_SPECIALIZED", 0)
+        mocker.patch.object(_kernels, "_specialized", {})
+        assert _kernels.specialized_lap2d((4, 3), np.float64) is None
+
+    @pytest.mark.parametrize("shape", [(6, 7), (1, 5), (5, 1), (2, 2)])
+    def test_lap2d_random_bands(self, shape):
+        pytest.importorskip("numba")
+        rng = np.random.default_rng(0)
+        u = rng.random(shape)
+        x_bands, y_bands = rng.random((3, shape[1])), rng.random((3, shape[0]))
+        x_bands[0, 0] = x_bands[2, -1] = y_bands[0, 0] = y_bands[2, -1] = 0
+        expected = np.empty_like(u)
+        _kernels._lap2d_numpy(u, expected, x_bands, y_bands, 9, 4)
+        actual = np.empty_like(u)
+        _kernels._lap2d(u, actual, x_bands, y_bands, 9.0, 4.0, 2, 3)
+        np.testing.assert_array_almost_equal(x=actual, y=expected)
+
+    @pytest.mark.skipif(not _kernels.cuda_available(), reason="no cuda device")
+    @pytest.mark.parametrize("shape", [(4, 3), (37, 21)])
+    def test_lap2d_cuda_matches_kron(self, shape):
+        ny, nx = shape
+        x_matrix = differentiation_matrix(n_cells=nx)
+        y_matrix = differentiation_matrix(n_cells=ny)
+        x_matrix.set_dirichlet_boundary("left", "finite_volume")
+        y_matrix.set_neumann_boundary("top", "finite_volume")
+        u = np.arange(float(ny * nx)).reshape(ny, nx) ** 2
+        laplacian = 9 * np.kron(np.identity(ny), x_matrix.get_matrix().toarray()) + (
+            4 * np.kron(y_matrix.get_matrix().toarray(), np.identity(nx))
+        )
+        actual = _kernels.lap2d_cuda(
+            _kernels.cupy.asarray(u), x_matrix.get_bands(), y_matrix.get_bands(), 9, 4
+        )
+        np.testing.assert_array_almost_equal(
+            x=_kernels.cupy.asnumpy(actual).ravel(), y=laplacian @ u.ravel()
+        )
+
+    def test_tile_rows(self):
+        assert _kernels.tile_rows(nx=1024, itemsize=8) == 42
+        assert _kernels.tile_rows(nx=10**9, itemsize=8) == 1
+
+
+class TestTriMatvec:
+    @pytest.mark.parametrize("n_cells", [1, 2, 7])
+    def test_tri_matvec_matches_csr(self, n_cells):
+        matrix = differentiation_matrix(n_cells=n_cells)
+        if n_cells > 1:
+            matrix.set_neumann_boundary("left", "finite_volume")
+        x = np.arange(1.0, n_cells + 1) ** 2
+        expected = matrix.get_matrix() @ x
+        np.testing.assert_array_almost_equal(
+            x=_kernels.tri_matvec(matrix.get_bands(), x), y=expected
+        )
+        out = np.empty_like(x)
+        _kernels._tri_matvec_numpy(matrix.get_bands(), x, out)
+        np.testing.assert_array_almost_equal(x=out, y=expected)
+
+    def test_tri_matvec_keeps_float32(self):
+        matrix = differentiation_matrix(n_cells=5)
+        x = np.ones(5, dtype=np.float32)
+        assert _kernels.tri_matvec(matrix.get_bands(), x).dtype == np.float32
@@ -1,8 +1,8 @@
 import pytest
 import numpy as np
+import scipy
 from solver.mesher import heat_diffusion_mesh
 from solver.mesher import create_1Dmesh
-from unittest.mock import patch, MagicMock
 from solver import mesher
 
 
@@ -32,6 +32,11 @@ class Test_mesh:
     def test_delta_x(self, mesh_fixture):
         assert mesh_fixture.delta_x == self.expected_delta_x
 
+    def test_inv_delta_x_sq(self, mesh_fixture):
+        assert mesh_fixture.inv_delta_x_sq == pytest.approx(
+            1 / self.expected_delta_x**2
+        )
+
 
 ############################################################
 class Test_maccormac_linear_convection_mesh(Test_mesh):
@@ -95,18 +100,20 @@ class Test_maccormac_linear_convection_mesh(Test_mesh):
         )
 
     def test_maccormack_laplacian(self, mesh_fixture):
-        np.testing.assert_array_equal(mesh_fixture.laplacian, self.expected_laplacian)
+        np.testing.assert_array_equal(
+            mesh_fixture.laplacian.toarray(), self.expected_laplacian
+        )
 
     def test_maccormack_predictor_differentiation_matrix(self, mesh_fixture):
         np.testing.assert_array_equal(
-            mesh_fixture.predictor_differentiation_matrix,
+            mesh_fixture.predictor_differentiation_matrix.toarray(),
             self.expected_predictor_differentiation_matrix,
         )
 
     def test_mcormak_left_dirichlet_laplacian(self, mesh_fixture):
         mesh_fixture.set_dirichlet_boundary("left", 5)
         np.testing.assert_array_equal(
-            mesh_fixture.laplacian,
+            mesh_fixture.laplacian.toarray(),
             self.expected_left_dirichlet_laplacian,
         )
 
@@ -115,7 +122,7 @@ class Test_maccormac_linear_convection_mesh(Test_mesh):
     ):
         mesh_fixture.set_dirichlet_boundary("left", 5)
         np.testing.assert_array_equal(
-            mesh_fixture.predictor_differentiation_matrix,
+            mesh_fixture.predictor_differentiation_matrix.toarray(),
             self.expected_left_dirichlet_predctor_laplacian,
         )
 
@@ -171,12 +178,14 @@ class Test_central_linear_convection_mesh(Test_mesh):
         )
 
     def test_central_laplacian(self, mesh_fixture):
-        np.testing.assert_array_equal(mesh_fixture.laplacian, self.expected_laplacian)
+        np.testing.assert_array_equal(
+            mesh_fixture.laplacian.toarray(), self.expected_laplacian
+        )
 
     def test_central_left_dirichlet_laplacian(self, mesh_fixture):
         mesh_fixture.set_dirichlet_boundary("left", 5)
         np.testing.assert_array_equal(
-            mesh_fixture.laplacian,
+            mesh_fixture.laplacian.toarray(),
             self.expected_left_dirichlet_laplacian,
         )
 
@@ -200,7 +209,7 @@ class Test_central_linear_convection_mesh(Test_mesh):
     def test_right_laplacian(self, mesh_fixture):
         mesh_fixture.set_right_boundary()
         np.testing.assert_array_equal(
-            mesh_fixture.laplacian,
+            mesh_fixture.laplacian.toarray(),
             self.expected_right_laplacian,
         )
 
@@ -267,7 +276,7 @@ class Test_central_linear_convection_mesh_fv(Test_central_linear_convection_mesh
     def test_central_right_dirichlet_laplacian(self, mesh_fixture):
         mesh_fixture.set_dirichlet_boundary("right", 5)
         np.testing.assert_array_equal(
-            mesh_fixture.laplacian,
+            mesh_fixture.laplacian.toarray(),
             self.expected_right_dirichlet_laplacian,
         )
 
@@ -309,7 +318,7 @@ class Test_linear_convection_mesh(Test_mesh):
     def test_initiate_laplacian(self, mesh_fixture):
         # mesh_fixture.set_centeral_
         np.testing.assert_allclose(
-            actual=mesh_fixture.laplacian,
+            actual=mesh_fixture.laplacian.toarray(),
             desired=self.expected_laplacian,
             atol=0.000001,
         )
@@ -321,6 +330,16 @@ class Test_linear_convection_mesh(Test_mesh):
                 x=[0, 1], n_cells=4, convection_coefficient=-1
             )
 
+    @pytest.mark.parametrize(
+        "inputs",
+        [{"convection_coefficient": 0}, {"discretization_type": "lax_wendroff"}],
+    )
+    def test_invalid_input_raises_before_allocating(self, mocker, inputs):
+        grid = mocker.patch.object(mesher, "grid")
+        with pytest.raises(ValueError):
+            mesher.linear_convection_mesh(x=[0, 1], n_cells=4, **inputs)
+        grid.assert_not_called()
+
     def test_set_phi(self, mesh_fixture):
         mesh_fixture.phi.set_phi(phi=[1, 2, 4, 5])
         np.testing.assert_equal(mesh_fixture.phi.get_phi(), [1, 2, 4, 5])
@@ -333,6 +352,18 @@ class Test_linear_convection_mesh(Test_mesh):
         mesh_fixture.phi.set_phi(phi=5)
         np.testing.assert_equal(mesh_fixture.phi.get_phi(), [5, 5, 5, 5])
 
+    def test_set_phi_numpy_scalar_in_place(self, mesh_fixture):
+        phi = mesh_fixture.phi.get_phi()
+        mesh_fixture.phi.set_phi(phi=np.float32(5))
+        assert mesh_fixture.phi.get_phi() is phi
+        np.testing.assert_equal(phi, [5, 5, 5, 5])
+
+    def test_set_phi_ndarray_in_place(self, mesh_fixture):
+        phi = mesh_fixture.phi.get_phi()
+        mesh_fixture.phi.set_phi(np.array([1, 2, 4, 5]))
+        assert mesh_fixture.phi.get_phi() is phi
+        np.testing.assert_equal(phi, [1, 2, 4, 5])
+
     def test_phi_nparray(self, mesh_fixture):
         expected = np.array([5, 5, 5, 5])
         mesh_fixture.phi.set_phi(expected.tolist())
@@ -365,7 +396,7 @@ class Test_linear_convection_mesh(Test_mesh):
     def test_left_dirichlet_differentiaton_matrix(self, mesh_fixture):
         mesh_fixture.set_dirichlet_boundary("left", 5)
         np.testing.assert_array_equal(
-            mesh_fixture.laplacian,
+            mesh_fixture.laplacian.toarray(),
             self.expected_left_dirichlet_laplacian,
         )
 
@@ -414,7 +445,7 @@ class Test_heat_diffusion_mesh(Test_mesh):
 
     def test_initiate_laplacian(self, mesh_fixture):
         np.testing.assert_allclose(
-            actual=mesh_fixture.laplacian,
+            actual=mesh_fixture.laplacian.toarray(),
             desired=self.expected_laplacian,
             atol=0.000001,
         )
@@ -443,7 +474,7 @@ class Test_heat_diffusion_mesh(Test_mesh):
         mesh_fixture.set_dirichlet_boundary("left", 50)
 
         np.testing.assert_allclose(
-            actual=mesh_fixture.laplacian,
+            actual=mesh_fixture.laplacian.toarray(),
             desired=self.expected_boundary_condition_left_dirichlet_d2matrix,
         )
 
@@ -458,7 +489,7 @@ class Test_heat_diffusion_mesh(Test_mesh):
         mesh_fixture.set_dirichlet_boundary("right", 50)
 
         np.testing.assert_allclose(
-            actual=mesh_fixture.laplacian,
+            actual=mesh_fixture.laplacian.toarray(),
             desired=self.expected_boundary_condition_right_dirichlet_d2matrix,
         )
 
@@ -474,7 +505,7 @@ class Test_heat_diffusion_mesh(Test_mesh):
         mesh_fixture.set_neumann_boundary("left", 50)
 
         np.testing.assert_allclose(
-            actual=mesh_fixture.laplacian,
+            actual=mesh_fixture.laplacian.toarray(),
             desired=self.expected_boundary_condition_left_neumann_d2matrix,
         )
 
@@ -497,14 +528,35 @@ class Test_heat_diffusion_mesh(Test_mesh):
         mesh_fixture.set_neumann_boundary("right", 50)
 
         np.testing.assert_allclose(
-            actual=mesh_fixture.laplacian,
+            actual=mesh_fixture.laplacian.toarray(),
             desired=self.expected_boundary_condition_right_neumann_d2matrix,
         )
 
+    def test_neumann_value_update_keeps_d2_matrix(self, mesh_fixture):
+        mesh_fixture.set_neumann_boundary("left", 10)
+        laplacian = mesh_fixture.laplacian
+        mesh_fixture.set_neumann_boundary("left", 50)
+        assert mesh_fixture.laplacian is laplacian
+        np.testing.assert_allclose(
+            actual=mesh_fixture.boundary_condition_array,
+            desired=self.expected_boundary_condition_left_neumann,
+        )
+
     def test_unsuported_boundary_conndtion_raises(self, mesh_fixture):
         with pytest.raises(ValueError):
             mesh_fixture.set_neumann_boundary("lleft", 50)
 
+    def test_solve_implicit(self, mesh_fixture):
+        mesh_fixture.set_dirichlet_boundary("left", 50)
+        rhs = np.arange(self.n_cells, dtype=float)
+        k = 0.5 * 2 / mesh_fixture.delta_x**2
+        a = np.identity(self.n_cells) - k * mesh_fixture.laplacian.toarray()
+        np.testing.assert_allclose(
+            actual=mesh_fixture.solve_implicit(dt=2, alpha=0.5, rhs=rhs),
+            desired=np.linalg.solve(a, rhs),
+            atol=1e-12,
+        )
+
 
 # Test that a different x range can work
 class Test_x_range(Test_heat_diffusion_mesh):
@@ -622,13 +674,56 @@ def test_finite_difference_dirichlet_overwrite_temperature(five_cell_mesh):
     )
 
 
-def test_init():
-    from solver import mesher
+def test_float32_mesh():
+    mesh = heat_diffusion_mesh(x=[0, 1], n_cells=4, dtype=np.float32)
+    mesh.set_dirichlet_boundary("left", 50)
+    mesh.set_cell_temperature(20)
+    assert mesh.xcell_center.dtype == np.float32
+    assert mesh.laplacian.dtype == np.float32
+    assert mesh.boundary_condition_array.dtype == np.float32
+    assert mesh.temperature.dtype == np.float32
+
+
+def test_state_buffer_views():
+    mesh = heat_diffusion_mesh(x=[0, 1], n_cells=4)
+    mesh.set_dirichlet_boundary("left", 50)
+    mesh.temperature = np.array([1.0, 2.0, 3.0, 4.0])
+    assert mesh.temperature.base is mesh._state
+    assert mesh.boundary_condition_array.base is mesh._state
+    assert mesh.xcell_center.base is mesh._state
+    np.testing.assert_allclose(
+        actual=mesh._state,
+        desired=[[1, 2, 3, 4], [100, 0, 0, 0], [0.125, 0.375, 0.625, 0.875]],
+    )
+
+
+@pytest.mark.parametrize(
+    "side, boundary, interior, axis",
+    [("left", 0, 1, "x"), ("right", -1, -2, "x"), ("top", 0, 1, "y")],
+)
+def test_side_selector(side, boundary, interior, axis):
+    selector = mesher.side_selector()
+    assert selector.boundary_index(side) == boundary
+    assert selector.first_interior_index(side) == interior
+    assert selector.axis(side) == axis
+    with pytest.raises(ValueError):
+        selector.boundary_index("front")
+
+
+def test_banded_form():
+    matrix = np.array([[4, 1, 0, 0], [2, 5, 1, 0], [3, 2, 6, 1], [0, 3, 2, 7]])
+    (lower, upper), ab = mesher.banded_form(scipy.sparse.csr_matrix(matrix))
+    assert (lower, upper) == (2, 1)
+    np.testing.assert_allclose(
+        actual=ab,
+        desired=np.array([[0, 1, 1, 1], [4, 5, 6, 7], [2, 2, 2, 0], [3, 3, 0, 0]]),
+    )
 
-    with patch.object(mesher, "main", MagicMock()) as mock_main:
-        with patch.object(mesher, "__name__", "__main__"):
-            mesher.init()
-            mock_main.assert_called_once()
+
+def test_bandwidth():
+    matrix = scipy.sparse.diags([1, -2, 1, 3], [-1, 0, 1, 3], shape=(5, 5))
+    assert mesher.bandwidth(matrix) == (1, 3)
+    assert mesher.bandwidth(scipy.sparse.csr_matrix((3, 3))) == (0, 0)
 
 
 class Test_upwind_linear_convection_mesh_finite_volume(Test_linear_convection_mesh):
@@ -772,7 +867,7 @@ class Test_differentiation_matrix:
     def test_differentiation_matrix_dirichlet(self, side, expected):
         actual = mesher.differentiation_matrix(n_cells=3)
         actual.set_dirichlet_boundary(side, "finite_volume")
-        np.testing.assert_array_equal(x=actual.get_matrix(), y=expected)
+        np.testing.assert_array_equal(x=actual.get_matrix().toarray(), y=expected)
 
     left_neumann = np.array([[-1, 1, 0], [1, -2, 1], [0, 1, -2]])
     right_neumann = np.array([[-2, 1, 0], [1, -2, 1], [0, 1, -1]])
@@ -789,4 +884,159 @@ class Test_differentiation_matrix:
     def test_boundary_condtion_neumann(self, side, expected):
         actual = mesher.differentiation_matrix(n_cells=3)
         actual.set_neumann_boundary(side, "finite_volume")
-        np.testing.assert_array_equal(x=actual.get_matrix(), y=expected)
+        np.testing.assert_array_equal(x=actual.get_matrix().toarray(), y=expected)
+
+    def test_differentiation_matrix_is_sparse(self):
+        actual = mesher.differentiation_matrix(n_cells=3).get_matrix()
+        assert scipy.sparse.isspmatrix_csr(actual)
+
+    def test_boundary_edit_in_place(self):
+        matrix = mesher.differentiation_matrix(n_cells=3)
+        before = matrix.get_matrix()
+        matrix.set_dirichlet_boundary("left", "finite_volume")
+        matrix.set_neumann_boundary("right", "finite_difference")
+        assert matrix.get_matrix() is before
+        np.testing.assert_array_equal(
+            x=before.toarray(), y=np.array([[-3, 1, 0], [1, -2, 1], [0, 2, -2]])
+        )
+
+    def test_write_diag_inserts_missing_entry(self):
+        matrix = mesher.central_differentiation_matrix(n_cells=3)
+        matrix._write_diag(0, -1, 4)
+        np.testing.assert_array_equal(
+            x=matrix.get_matrix().toarray(),
+            y=np.array([[0, -0.5, 0], [0.5, 0, -0.5], [0, 0.5, 4]]),
+        )
+
+    def test_csr_set(self):
+        matrix = scipy.sparse.identity(3, format="csr")
+        assert mesher._csr_set(matrix, -1, -1, 5) is matrix
+        inserted = mesher._csr_set(matrix, 2, 0, 7)
+        np.testing.assert_array_equal(
+            x=inserted.toarray(), y=np.array([[1, 0, 0], [0, 1, 0], [7, 0, 5]])
+        )
+
+    def test_template_not_shared(self):
+        first = mesher.differentiation_matrix(n_cells=3)
+        first.set_dirichlet_boundary("left", "finite_volume")
+        second = mesher.differentiation_matrix(n_cells=3)
+        assert second.get_matrix()[0, 0] == -2
+
+
+def test_mesh_objects_share_the_state_buffer():
+    mesh = heat_diffusion_mesh(x=[0, 1], n_cells=11)
+    assert mesh.boundary_condition_object.boundary_condition_array.base is mesh._state
+    assert mesh.cell_phi.phi.base is mesh._state
+
+
+def test_convection_phi_on_the_state_buffer():
+    mesh = mesher.linear_convection_mesh(x=[0, 1], n_cells=5)
+    mesh.phi.set_phi(phi=[1, 2, 3, 4, 5])
+    assert mesh.phi.phi.base is mesh._state
+    np.testing.assert_array_equal(mesh._state[0], [1, 2, 3, 4, 5])
+
+
+@pytest.mark.parametrize("mesh_type", ["finite_volume", "finite_difference"])
+def test_boundary_at_matches_side(mesh_type):
+    by_side = mesher.differentiation_matrix(n_cells=5)
+    by_index = mesher.differentiation_matrix(n_cells=5)
+    by_side.set_dirichlet_boundary("right", mesh_type)
+    by_side.set_neumann_boundary("left", mesh_type)
+    by_index.set_dirichlet_boundary_at(-1, -2, mesh_type)
+    by_index.set_neumann_boundary_at(0, 1, mesh_type)
+    np.testing.assert_array_equal(
+        x=by_index.get_matrix().toarray(), y=by_side.get_matrix().toarray()
+    )
+
+
+def test_invalid_mesh_type_message():
+    with pytest.raises(ValueError, match="mesh_type must be finite_volume"):
+        mesher.boundary_condition(n_cells=3, mesh_type="finite_element")
+
+
+@pytest.mark.parametrize(
+    "matrix_class",
+    [
+        mesher.differentiation_matrix,
+        mesher.upwind_differentiation_matrix,
+        mesher.central_differentiation_matrix,
+        mesher.maccormack_differentiation_matrix,
+    ],
+)
+def test_bands_track_matrix(matrix_class):
+    matrix = matrix_class(n_cells=6)
+    matrix.set_dirichlet_boundary("left", "finite_difference")
+    matrix.set_neumann_boundary("right", "finite_volume")
+    csr = matrix.get_matrix()
+    bands = matrix.get_bands()
+    assert bands.flags.c_contiguous
+    np.testing.assert_array_equal(bands[0, 1:], csr.diagonal(-1))
+    np.testing.assert_array_equal(bands[1], csr.diagonal(0))
+    np.testing.assert_array_equal(bands[2, :-1], csr.diagonal(1))
+    assert bands[0, 0] == bands[2, -1] == 0
+
+
+def test_matrix_attribute_is_get_matrix():
+    matrix = mesher.differentiation_matrix(n_cells=4)
+    matrix.set_dirichlet_boundary("left", "finite_volume")
+    assert matrix.matrix is matrix.get_matrix()
+
+
+@pytest.mark.parametrize(
+    "discretization_type,first_row,last_row",
+    [
+        ("central", [-0.5, -0.5, 0, 0, 0], [0, 0, 0, 0.5, 0.5]),
+        ("upwind", [-1, 0, 0, 0, 0], [0, 0, 0, 1, -1]),
+    ],
+)
+def test_convection_dirichlet_both_sides(discretization_type, first_row, last_row):
+    """The second boundary must not undo the convection edit of the first."""
+    mesh = mesher.linear_convection_mesh(
+        x=[0, 1], n_cells=5, discretization_type=discretization_type
+    )
+    mesh.set_dirichlet_boundary("left", 1)
+    mesh.set_dirichlet_boundary("right", 2)
+    laplacian = mesh.laplacian.toarray()
+    np.testing.assert_array_equal(x=laplacian[0], y=first_row)
+    np.testing.assert_array_equal(x=laplacian[-1], y=last_row)
+    assert mesh.laplacian is mesh.x_differentiation_matrix.matrix
+
+
+def test_convection_right_boundary_kept():
+    mesh = mesher.linear_convection_mesh(x=[0, 1], n_cells=5)
+    mesh.set_right_boundary()
+    mesh.set_dirichlet_boundary("left", 1)
+    np.testing.assert_array_equal(
+        x=mesh.laplacian.toarray()[-1], y=[0, 0, 1.5, -1, 0.5]
+    )
+    assert not mesh.x_differentiation_matrix.tridiagonal
+    phi = np.arange(5.0)
+    np.testing.assert_array_almost_equal(
+        x=mesh.x_differentiation_matrix.apply(phi), y=mesh.laplacian @ phi
+    )
+
+
+def test_maccormack_predictor_edited_in_place():
+    mesh = mesher.linear_convection_mesh(
+        x=[0, 1],
+        n_cells=5,
+        mesh_type="finite_difference",
+        discretization_type="maccormack",
+    )
+    predictor = mesh.predictor_differentiation_matrix
+    mesh.set_dirichlet_boundary("left", 1)
+    mesh.set_dirichlet_boundary("right", 2)
+    assert mesh.predictor_differentiation_matrix is predictor
+    assert not predictor.toarray()[[0, -1]].any()
+
+
+def test_finite_difference_dirichlet_clears_right_boundary_stencil():
+    mesh = mesher.linear_convection_mesh(
+        x=[0, 1], n_cells=5, mesh_type="finite_difference"
+    )
+    mesh.set_right_boundary()
+    assert not mesh.x_differentiation_matrix.tridiagonal
+    mesh.set_dirichlet_boundary("right", 1)
+    assert not mesh.laplacian.toarray()[-1].any()
+    assert mesh.x_differentiation_matrix.tridiagonal
+    assert not mesh.x_differentiation_matrix.get_bands()[:, -1].any()
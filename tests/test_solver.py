@@ -1,13 +1,12 @@
 import numpy as np
 import pandas as pd
+import scipy
 import pytest
 from solver.solver import solver_1d, SteadySolver, Solver
 from solver.mesher import heat_diffusion_mesh
 from solver import solver
 from solver import cartesian_mesh
 
-from unittest.mock import patch, MagicMock
-
 
 # TODO move this integration test to its own section
 # Create a mesh for some integration testing with the meshing
@@ -39,6 +38,26 @@ def test_initiate_solver(integration_test_explicit_solver):
     assert integration_test_explicit_solver.mesh.thermal_diffusivity == 0.0001
 
 
+def test_explicit_step_uses_tridiagonal_kernel(
+    integration_test_explicit_solver, mocker
+):
+    from solver import mesher
+
+    solver_instance = integration_test_explicit_solver
+    tri_matvec = mocker.spy(mesher, "tri_matvec")
+    phi = np.arange(1.0, 5.0) ** 2
+    expected = phi + 0.5 * (solver_instance.laplacian @ phi)
+    actual = solver_instance.stepper.take_step(
+        method="explicit",
+        k=0.5,
+        laplacian=solver_instance.explicit_laplacian,
+        boundary_condition_array=np.zeros(4),
+        phi=phi,
+    )
+    np.testing.assert_array_almost_equal(x=actual, y=expected)
+    tri_matvec.assert_called_once()
+
+
 ## End integration test
 
 
@@ -225,25 +244,6 @@ def test_integration_solve_save_state(explicit_solver):
     pd.testing.assert_frame_equal(solver_instance.saved_data, expected_data_frame)
 
 
-def test_init():
-    from solver import solver
-
-    with patch.object(solver, "main", MagicMock()) as mock_main:
-        with patch.object(solver, "__name__", "__main__"):
-            solver.init()
-    mock_main.assert_called_once()
-
-
-# from unittest import mock
-# def test_init():
-#     from solver import solver
-
-
-#     with mock.patch.object(solver, "main", return_value = 42):
-#         with mock.patch.object(solver, "__name__", "__main__"):
-#             with mock.patch.object(solver.sys,'exit') as mock_exit:
-#                 solver.init()
-#                 assert mock_exit.call_args[0][0] == 42
 @pytest.fixture
 def mock_linear_convective_mesh_upwind(mocker):
     """
@@ -467,6 +467,52 @@ class TestCartesianMesh_Integration:
         expected = steady_2d_solved
         # verify it matches the steady case
         np.testing.assert_array_almost_equal(x=actual_phi, y=expected)
+        # the first record keeps the initial phi
+        assert not np.allclose(actual.saved_state_list[0]["phi"], actual_phi)
+
+
+def test_implicit_step_2d_skips_banded_form(mocker):
+    """A 2d laplacian is not tridiagonal, its ab array is never built."""
+    banded_form = mocker.spy(solver, "banded_form")
+    laplacian = scipy.sparse.kronsum(
+        scipy.sparse.diags([1, -2, 1], [-1, 0, 1], shape=(4, 4)),
+        scipy.sparse.diags([1, -2, 1], [-1, 0, 1], shape=(3, 3)),
+        format="csr",
+    )
+    phi = np.arange(12.0)
+    actual = solver.ImplicitStep().step(
+        k=0.5, laplacian=laplacian, boundary_condition_array=np.zeros(12), phi=phi
+    )
+    expected = np.linalg.solve(np.identity(12) - 0.5 * laplacian.toarray(), phi)
+    np.testing.assert_array_almost_equal(x=actual, y=expected)
+    banded_form.assert_not_called()
+
+
+def test_implicit_step_reuses_factorization(mocker):
+    """The system is factored once while the laplacian and k are unchanged."""
+    splu = mocker.spy(solver.scipy.sparse.linalg, "splu")
+    laplacian = scipy.sparse.kronsum(
+        scipy.sparse.diags([1, -2, 1], [-1, 0, 1], shape=(4, 4)),
+        scipy.sparse.diags([1, -2, 1], [-1, 0, 1], shape=(3, 3)),
+        format="csr",
+    )
+    step = solver.ImplicitStep()
+    phi = np.arange(12.0)
+    for _ in range(3):
+        phi = step.step(
+            k=0.5, laplacian=laplacian, boundary_condition_array=np.ones(12), phi=phi
+        )
+    assert splu.call_count == 1
+    # an in place change to the laplacian values is factored again
+    laplacian.data[0] = -3
+    actual = step.step(
+        k=0.5, laplacian=laplacian, boundary_condition_array=np.ones(12), phi=phi
+    )
+    expected = np.linalg.solve(
+        np.identity(12) - 0.5 * laplacian.toarray(), phi + 0.5 * np.ones(12)
+    )
+    np.testing.assert_array_almost_equal(x=actual, y=expected)
+    assert splu.call_count == 2
 
 
 if __name__ == "__main__":
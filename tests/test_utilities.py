@@ -66,9 +66,9 @@ class TestEnergyBalance:
             "top": "neuimann",
         }
 
-        mesh.grid["x_grid"].cell_width = 5
+        mesh.grid[0].cell_width = 5
         # mocker.MagicMock(return_value = [4,5])
-        # mesh.grid["y_grid"].cell_width = 3
+        # mesh.grid[1].cell_width = 3
 
         mesh.n_cells = [3, 4]
         mesh.conductivity = 1